@@ -2,7 +2,7 @@ import argparse
 from pathlib import Path
 import sys
 
-from jinja2 import Environment, ChoiceLoader, FileSystemLoader, BaseLoader, TemplateNotFound, select_autoescape
+from jinja2 import Environment, ChoiceLoader, FileSystemLoader, BaseLoader, TemplateNotFound, FileSystemBytecodeCache, select_autoescape
 
 def get_parser():
     """
@@ -13,6 +13,7 @@ def get_parser():
     parser.add_argument("output", type=Path, help='The output HTML file to create.')
     parser.add_argument("--set-variables", "-v", type=str, nargs="*", help='A variable to set for the template, of the format "var=value".')
     parser.add_argument("--template-paths", "-p", type=Path, nargs="*", help='Paths to find template files included or extended by the template being rendered.')
+    parser.add_argument("--bytecode-cache", "-c", type=Path, default=None, help='A directory to cache compiled templates in, so that templates shared between pages are only compiled once.')
     return parser
 
 def main(args):
@@ -40,21 +41,55 @@ def main(args):
         print(f"Setting variable {var[0]} = '{var[1]}'")
 
 
+    if args.bytecode_cache is not None:
+        print(f"Using bytecode cache: {args.bytecode_cache}")
+
+    env = build_environment(paths, args.bytecode_cache)
+    render_template(env, args.input, args.output, vars)
+
+def build_environment(template_paths, bytecode_cache=None):
+    """
+    Build the jinja environment used to render templates. Rendering multiple templates
+    with the same environment allows the templates they share to only be compiled once.
+
+    Args:
+        template_paths (list of str): Paths to find template files included or extended by rendered templates.
+        bytecode_cache (pathlib.Path): A directory to cache compiled templates in between runs, or None to not
+                                       use one.
+
+    Returns (jinja2.Environment): The environment.
+    """
     # Build the jinja template loader to use either our simple path loader or jinja2's FileSystemLoader. The
     # difference is that the FileSystemLoader *only* looks in the given paths, and ignores absolute paths.
     # Our PathLoader will open anything that the python "open" call can find, but doesn't know about template paths
     # Doing it this way allows the command line to specify a template via a pathname while the templates can assume
     # a fixed template path in their "extends" directives.
-    loader = ChoiceLoader([PathLoader(), FileSystemLoader(paths)])
+    loader = ChoiceLoader([PathLoader(), FileSystemLoader(template_paths)])
+
+    # The bytecode cache compares a checksum of each template's source, so changed templates
+    # are recompiled
+    cache = None
+    if bytecode_cache is not None:
+        bytecode_cache.mkdir(parents=True, exist_ok=True)
+        cache = FileSystemBytecodeCache(str(bytecode_cache))
 
-    # Build the environment and get the input template
-    env = Environment(loader=loader, autoescape=select_autoescape())
+    return Environment(loader=loader, autoescape=select_autoescape(), bytecode_cache=cache)
 
-    print(f"Rendering template {args.input} to {args.output}")
-    template = env.get_template(str(args.input))
+def render_template(env, input, output, vars):
+    """
+    Render a template to an output file.
+
+    Args:
+        env (jinja2.Environment): The environment returned by :func:`build_environment`.
+        input (pathlib.Path):     The source template to render.
+        output (pathlib.Path):    The output HTML file to create.
+        vars (dict):              The variables to set for the template.
+    """
+    print(f"Rendering template {input} to {output}")
+    template = env.get_template(str(input))
 
     # Render the template to the output file
-    with open(args.output, "w") as f:
+    with open(output, "w") as f:
         print(template.render(**vars),file=f)
 
 class PathLoader(BaseLoader):
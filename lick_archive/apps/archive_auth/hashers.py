@@ -1,3 +1,5 @@
+from functools import cached_property
+
 from django.contrib.auth.hashers import BasePasswordHasher
 from django.utils.crypto import get_random_string, RANDOM_STRING_CHARS
 
@@ -9,6 +11,13 @@ class APR_MD5PasswordHasher(BasePasswordHasher):
 
     passlib_algorithm = "apr_md5_crypt"
     algorithm = "apr1md5"
+
+    @cached_property
+    def _context(self):
+        """The passlib CryptContext used to hash and verify passwords. It is built once, as
+        building it is more expensive than hashing a short password."""
+        return CryptContext(self.passlib_algorithm)
+
     def salt(self):
         """Return a salt value for this algorithm"""
         # Return salt 8 characters long, to prevent failures since this algorithm only supports 8 characters of salt
@@ -26,16 +35,14 @@ class APR_MD5PasswordHasher(BasePasswordHasher):
         so we prepend a different algorithm string to make django happy.
         """       
         self._check_encode_args(password, salt)
-        ctx = CryptContext(self.passlib_algorithm)
-        result = self.algorithm + ctx.hash(password,salt=salt)
+        result = self.algorithm + self._context.hash(password,salt=salt)
         return result
 
     def verify(self, password, encoded):
         """Verify if a password matches a given encoded hash."""
-        ctx = CryptContext(self.passlib_algorithm)
         if encoded.startswith(self.algorithm):
             hash = encoded[len(self.algorithm):]
-            result = ctx.verify(password, hash)
+            result = self._context.verify(password, hash)
         else:
             result = False
         return result
@@ -5,12 +5,35 @@ from http import HTTPStatus
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.http import JsonResponse, HttpResponse, HttpResponseNotAllowed
 from django.contrib.auth import authenticate,login,logout
+from django.core.cache import cache
 from django.middleware.csrf import get_token
+from django.utils.crypto import salted_hmac
+from rest_framework.throttling import BaseThrottle
 
 from lick_archive.utils.django_utils import validate_username, log_request_debug
 
 logger = logging.getLogger(__name__)
 
+# After this many failed logins for a username, or from one client address, further logins are rejected
+# without running the deliberately slow password hasher, until FAILED_LOGIN_TIMEOUT seconds after the
+# first of those failures.
+MAX_FAILED_LOGINS = 10
+FAILED_LOGIN_TIMEOUT = 300
+
+def _failed_login_cache_keys(request, username):
+    """Return the cache keys counting the failed logins for a username and for the client's address.
+    The client address is found the same way as for the REST API's throttling."""
+    return ["archive_auth.failed_logins.user:" + salted_hmac("archive_auth.failed_logins", username).hexdigest(),
+            "archive_auth.failed_logins.client:" + BaseThrottle().get_ident(request)]
+
+def _count_failed_login(cache_keys):
+    """Add a failed login to the failure counts."""
+    for key in cache_keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # There are no recent failures
+            cache.set(key, 1, FAILED_LOGIN_TIMEOUT)
 
 @ensure_csrf_cookie
 def get_csrf_token(request):
@@ -45,12 +68,21 @@ def login_user(request):
             # but we validate it so we can log it later without worrying about
             # logging unvalidated data
             validate_username(request.POST['username'])
+            failed_login_keys = _failed_login_cache_keys(request, request.POST['username'])
+            if any(count >= MAX_FAILED_LOGINS for count in cache.get_many(failed_login_keys).values()):
+                logger.info(f"Login failed for user '{request.POST['username']}', too many failed logins.")
+                return HttpResponse(status=HTTPStatus.TOO_MANY_REQUESTS)
+
             user = authenticate(request=request, username=request.POST['username'],password=request.POST['password'])
             if user is None:
                 logger.info(f"Login failed for user '{request.POST['username']}'")
+                _count_failed_login(failed_login_keys)
                 return HttpResponse(status=HTTPStatus.FORBIDDEN)
             else:
                 logger.info(f"Login succeeded for user '{user.get_username()}'")
+                # The client's failures are kept, so that logging in to one account doesn't allow more
+                # guesses at others
+                cache.delete(failed_login_keys[0])
                 login(request,user)
                 response["logged_in"] = True
                 response["user"] = user.get_username()
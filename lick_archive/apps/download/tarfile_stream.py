@@ -1,12 +1,26 @@
 """
 Class for streaming a tarball of multiple files. 
 """
+from collections import deque
+from functools import lru_cache
+import grp
+import os
+import pwd
 from pathlib import Path
 from typing import Optional, Iterator
 import tarfile
-import gzip
 import stat
-import io
+
+try:
+    # ISA-L's gzip implementation compresses several times faster than zlib's, use it if it's installed
+    from isal.igzip import IGzipFile as GzipFile
+    # ISA-L's default level
+    GZIP_COMPRESSLEVEL = 2
+except ImportError:
+    from gzip import GzipFile
+    # FITS data compresses poorly, so zlib's slower levels cost far more CPU than they save in
+    # size. Level 1 is over 10x faster than the default of 9, for about a 4% larger tarball.
+    GZIP_COMPRESSLEVEL = 1
 
 import logging
 logger = logging.getLogger(__name__)
@@ -14,6 +28,62 @@ logger = logging.getLogger(__name__)
 # Tar file block size
 BLOCKSIZE = 512
 
+# posix_fadvise isn't available on all platforms
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+# How much of each upcoming file to ask the kernel to read ahead
+PREFETCH_SIZE = 1024*1024
+
+# Reading a file for a download shouldn't update its access time. O_NOATIME is Linux only.
+_O_NOATIME = getattr(os, "O_NOATIME", 0)
+
+@lru_cache(maxsize=1024)
+def _user_name(uid : int) -> str:
+    """Return the name of a user id, or "" if it has none. The names are cached, because the
+    archive's files are owned by only a few users, and each lookup can go to NSS (LDAP/NIS)."""
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return ""
+
+@lru_cache(maxsize=1024)
+def _group_name(gid : int) -> str:
+    """Return the name of a group id, or "" if it has none. Cached like :func:`_user_name`."""
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return ""
+
+class _ChunkBuffer:
+    """A minimal writable file object that holds the data written to it as a deque of byte strings.
+    This avoids copying data within a single buffer as it is drained."""
+    def __init__(self):
+        self.chunks = deque()
+        # The total number of bytes in chunks
+        self.size = 0
+
+    def write(self, data) -> int:
+        if len(data) > 0:
+            self.chunks.append(bytes(data))
+            self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read(self, size : int) -> bytes:
+        """Remove and return at least size bytes from the front of the buffer, or all of it if there
+        is less than that. The byte strings written to the buffer are not split, so a large one
+        is returned without being copied."""
+        pieces = []
+        amount_read = 0
+        while len(self.chunks) > 0 and amount_read < size:
+            piece = self.chunks.popleft()
+            pieces.append(piece)
+            amount_read += len(piece)
+        self.size -= amount_read
+        return pieces[0] if len(pieces) == 1 else b''.join(pieces)
+
 class TarFileStream:
     """Class for generating a tarball of multiple files in a way suitable for streaming. The class implements the iterator protocol to allow
     iterating through byte strings of the generated tarball. 
@@ -28,52 +98,86 @@ class TarFileStream:
                   as files. If not specified the file's own name will be used, including the path. Any leading "/" will be stripped.
         enable_gzip: Enables creation of a gzipped tarball.
         format:      The format (as defined in the tarfile module) of the tar file to generate. Defaults to the GNU format.
-        chunk_size:  The size (in bytes) of each chunk of data returned by the iterator. Defaults to 100k
+        chunk_size:  The minimum size (in bytes) of each chunk of data returned by the iterator, other than the last one. Chunks
+                     can be larger, as data read from a file is not split between chunks. This is also the size of each read
+                     from the source files. Defaults to 128k
+        file_infos:  A list of TarInfo objects to use for each file, for example built from metadata in the database. If specified it must be the
+                     same length as files. A TarInfo is only used if its size matches the file when the file is opened, otherwise (or for a
+                     None entry, or not specifying file_infos) the header is created from the file's own stat information.
+        prefetch_depth: How many upcoming files to start reading in the background, so that their data is in the page
+                        cache when it's needed. This is only done on platforms with posix_fadvise. Defaults to 4.
     """
-    def __init__(self, name : Path|str, files : list[Path|str], arcfiles : Optional[list[Path|str]]=None, enable_gzip : bool=False, format=tarfile.DEFAULT_FORMAT,chunk_size : int =4*1024):
+    def __init__(self, name : Path|str, files : list[Path|str], arcfiles : Optional[list[Path|str]]=None, enable_gzip : bool=False, format=tarfile.DEFAULT_FORMAT,chunk_size : int =128*1024, file_infos : Optional[list[tarfile.TarInfo|None]]=None, prefetch_depth : int = 4):
         self.name = Path(name)
         self.files = [Path(file) for file in files]
         if arcfiles is None:
             # If the user didn't specify the archive file names, use the relative form of the input files path
-            self.arcfiles = [p.relative_to("/") if p.is_absolute() else p for p in self.files]
+            self.arcfiles = [str(p).lstrip("/") for p in self.files]
         elif len(arcfiles) != len(self.files):
             raise ValueError(f"When specifying 'arcfiles' the length ({len(arcfiles)}) must match the length of 'files' ({len(self.files)}).")
         else:
-            self.arcfiles = arcfiles
+            self.arcfiles = [str(arcfile) for arcfile in arcfiles]
+
+        if file_infos is not None and len(file_infos) != len(self.files):
+            raise ValueError(f"When specifying 'file_infos' the length ({len(file_infos)}) must match the length of 'files' ({len(self.files)}).")
+        self.file_infos = file_infos
+        # The tar headers of each file, if they were created before streaming by tarball_size()
+        self.headers = None
 
         self.gzip = enable_gzip
         self.chunk_size = chunk_size
         self.format = format
+        self.prefetch_depth = prefetch_depth if _HAS_FADVISE else 0
 
         # The index of the file within self.files that is currently being read
         self.current_file = -1
-        # The fileobject of the file currently being read
-        self.current_file_obj = None
-        # The size of the file currently being read
+        # The file descriptor of the file currently being read
+        self.current_fd = None
+        # The size of the file currently being read, and how much of it is left to read
         self.current_file_size = 0
+        self.current_file_remaining = 0
+        # The index of the last file prefetched
+        self.last_prefetched_file = -1
+        # The flags used to open files. O_NOATIME is dropped if we aren't allowed to use it.
+        self.open_flags = os.O_RDONLY | _O_NOATIME
 
         # The buffer that will hold data to be returned by the iterator
-        self.stream_buffer = io.BytesIO()
+        self.stream_buffer = _ChunkBuffer()
 
         # If gzipping, create a gzip file object to write the tar file data to.
-        # The gzip file writes to the stream buffer
+        # The gzip file writes to the stream buffer, starting with the gzip header
         if self.gzip:
-            # Strip gz off name for use in gzip file header if needed
-            name = self.name if self.name.suffix != ".gz" else self.name.name[0:-3]
-
-            self.tar_file_stream = gzip.GzipFile(filename=self.name, mode="wb", fileobj=self.stream_buffer)
-
-            # The gzip header was written to the buffer
-            # Set the buffer to be ready to read that data, as expected by __next__
-            self.buffer_size = self.stream_buffer.tell()
-            self.stream_buffer.seek(0)
-
+            self.tar_file_stream = GzipFile(filename=self.name, mode="wb", compresslevel=GZIP_COMPRESSLEVEL, fileobj=self.stream_buffer)
         else:
             # Not gzipping, write tar data directly to the stream buffer            
             self.tar_file_stream = self.stream_buffer
-            self.buffer_size = 0
 
 
+    def tarball_size(self) -> int|None:
+        """Return the size of the uncompressed tarball, so it can be sent as a Content-Length.
+        This stats each file and creates its tar header up front, and the headers are then reused while streaming.
+        Because the size has been promised, streaming fails if a file's size changes after this is called.
+
+        Return:
+            int: The size of the tarball in bytes, or None if the tarball is gzipped, as its size can't be known until it's compressed.
+        """
+        if self.gzip:
+            return None
+        if self.headers is None:
+            if self.file_infos is None:
+                self.file_infos = [None] * len(self.files)
+            file_infos = []
+            for file, arcfile, tar_info in zip(self.files, self.arcfiles, self.file_infos):
+                stat_info = file.stat()
+                if tar_info is None or tar_info.size != stat_info.st_size:
+                    tar_info = self._create_tar_info(arcfile, stat_info)
+                file_infos.append(tar_info)
+            self.file_infos = file_infos
+            self.headers = [tar_info.tobuf(format=self.format) for tar_info in self.file_infos]
+
+        # Each file's data is padded to the tar block size, and the tarball ends with two NUL filled blocks
+        return sum(len(header) + -(-tar_info.size // BLOCKSIZE) * BLOCKSIZE for header, tar_info in zip(self.headers, self.file_infos)) + BLOCKSIZE * 2
+
     def __iter__(self) -> Iterator:
         """Return an iterator for the tar file. Part of the iterator protocol."""
         return self
@@ -83,41 +187,27 @@ class TarFileStream:
         Part of the iterator protocol."""
         amount_in_buffer = self._fill_buffer() 
         
-         
         if amount_in_buffer == 0:
             raise StopIteration()
         
-        if amount_in_buffer >= self.chunk_size:
-            return self.stream_buffer.read(self.chunk_size)
-        else:
-            return self.stream_buffer.read(amount_in_buffer)
+        return self.stream_buffer.read(self.chunk_size)
         
+    def close(self):
+        """Close the file currently being read. Django's StreamingHttpResponse calls this when the
+        response is closed, including when the client disconnects before the tarball is finished."""
+        if self.current_fd is not None:
+            os.close(self.current_fd)
+            self.current_fd = None
+
     def _fill_buffer(self) -> int:
         """Fill the buffer with a chunk of data, if possible.
         
         Return:
             int: The amount of unread data in the buffer.
         """
-        amount_left_in_buffer = self.buffer_size - self.stream_buffer.tell()
-        if self.current_file >= len(self.files):
-            # There's nothing left to put in the buffer, let it drain
-            return amount_left_in_buffer
-
-        if amount_left_in_buffer < self.chunk_size:
-            # Need to fill the buffer, but don't overwrite the current contents
-            # I wish there were a deque or similar class that implemented a file object 
-            # interface bug there isn't and I was too lazy to write one.
-            # So I ended up doing the following  to move left over data back to 
-            # the beginning of the stream buffer
-            remainder = self.stream_buffer.read(amount_left_in_buffer)
-            self.stream_buffer.seek(0)
-            self.stream_buffer.write(remainder)
-
-            while self.stream_buffer.tell() < self.chunk_size and self.current_file < len(self.files):
-                self._generate_tarfile_chunk()
-            self.buffer_size = self.stream_buffer.tell()
-            self.stream_buffer.seek(0)
-        return self.buffer_size - self.stream_buffer.tell()
+        while self.stream_buffer.size < self.chunk_size and self.current_file < len(self.files):
+            self._generate_tarfile_chunk()
+        return self.stream_buffer.size
             
     def _generate_tarfile_chunk(self):         
         """Generate the next chunk of tarball data and write it to the internal stream buffer."""
@@ -125,19 +215,18 @@ class TarFileStream:
         # Loop until we run out of files or have filled a chunk.
         amount_read = 0
         while amount_read < self.chunk_size and self.current_file < len(self.files):
-            if self.current_file_obj is None:
+            if self.current_fd is None:
                 self._open_next_file()
 
             # If there was a zero length file, or we've run out of files, there won't be any data to read
-            if self.current_file_obj is None:
+            if self.current_fd is None:
                 return
 
-            source_chunk = self.current_file_obj.read(self.chunk_size)
-            if source_chunk is None or len(source_chunk) == 0:
+            if self.current_file_remaining == 0:
 
                 # Finished with the file
-                self.current_file_obj.close()
-                self.current_file_obj = None
+                os.close(self.current_fd)
+                self.current_fd = None
 
                 # Pad out the file to tarfile block size
                 mod, remainder = divmod(self.current_file_size, BLOCKSIZE)
@@ -146,6 +235,15 @@ class TarFileStream:
                     self.tar_file_stream.write(padding)
                 continue
             else:
+                # Only read the amount given in the tar header, in case the file has grown since the header was created
+                source_chunk = os.read(self.current_fd, min(self.chunk_size, self.current_file_remaining))
+                if len(source_chunk) == 0:
+                    # The file was truncated while being read. The header has already been sent, so the
+                    # tarball can't be completed without corrupting the file.
+                    file_path = self.files[self.current_file]
+                    self.close()
+                    raise RuntimeError(f"{file_path} is {self.current_file_remaining} bytes shorter than its tar header.")
+                self.current_file_remaining -= len(source_chunk)
                 amount_read = len(source_chunk)
                 self.tar_file_stream.write(source_chunk)
 
@@ -166,31 +264,97 @@ class TarFileStream:
             self.tar_file_stream = None
             return
 
-        # Generate tar_info for the next file and write it
-        tar_info = self._create_tar_info(self.files[self.current_file], self.arcfiles[self.current_file])
+        self._prefetch_files()
+
+        # Open the next file, and check its size against the tar header before writing the header
+        file_path = self.files[self.current_file]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Opening {file_path} for tar file stream.")
+        self.current_fd = self._open_file(file_path)
+        stat_info = os.fstat(self.current_fd)
+
+        tar_info = None if self.file_infos is None else self.file_infos[self.current_file]
+        if tar_info is None:
+            tar_info = self._create_tar_info(self.arcfiles[self.current_file], stat_info)
+        elif tar_info.size != stat_info.st_size:
+            if self.headers is not None:
+                # The size of this header was already promised by tarball_size()
+                self.close()
+                raise RuntimeError(f"{file_path} is {stat_info.st_size} bytes, but its tar header was created for {tar_info.size} bytes.")
+            # The TarInfo is out of date (or was for a symlink rather than its target), use the file's own information
+            logger.warning(f"{file_path} is {stat_info.st_size} bytes, but {tar_info.size} bytes were expected. Using the file's size.")
+            tar_info = self._create_tar_info(self.arcfiles[self.current_file], stat_info)
+
         self.current_file_size = tar_info.size
-        self.tar_file_stream.write(tar_info.tobuf(format=self.format))
+        self.current_file_remaining = tar_info.size
+        if self.headers is None:
+            self.tar_file_stream.write(tar_info.tobuf(format=self.format))
+        else:
+            self.tar_file_stream.write(self.headers[self.current_file])
 
-        # Don't open a zero length file
         if self.current_file_size > 0:
-            # Open the next file
-            logger.debug(f"Opening {self.files[self.current_file]} for tar file stream.")
-            self.current_file_obj = open(self.files[self.current_file],"rb")
+            if _HAS_FADVISE:
+                # The file is read start to finish, so ask for more aggressive read ahead
+                os.posix_fadvise(self.current_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
         else:
-            self.current_file_obj = None
-            logger.debug(f"Not opening zero length file {self.files[self.current_file]}")
+            # Nothing to read from a zero length file
+            self.close()
+
+    def _open_file(self, file_path : Path) -> int:
+        """Open a file for reading, without updating its access time if possible.
+        The file is read with os.read, avoiding the overhead of creating a buffered file object.
+
+        Return: The file descriptor of the opened file.
+        """
+        try:
+            return os.open(file_path, self.open_flags)
+        except PermissionError:
+            if self.open_flags == os.O_RDONLY:
+                raise
+            # O_NOATIME is only allowed for the file's owner. Assume the rest of the files
+            # have the same owner, and don't try it again.
+            logger.debug(f"Not permitted to open {file_path} with O_NOATIME, opening without it.")
+            self.open_flags = os.O_RDONLY
+            return os.open(file_path, self.open_flags)
 
-    def _create_tar_info(self, file_path : Path, dest_path : Path) -> tarfile.TarInfo:
-        logger.debug(f"Creating file {dest_path} in tarfile for source file {file_path}")
-        stat_info = file_path.stat()
-        tar_info = tarfile.TarInfo(name=str(dest_path))
+    def _prefetch_files(self):
+        """Ask the kernel to start reading the beginning of the next few files in the background.
+        This overlaps the storage latency of opening and reading each file with streaming the
+        current one, without needing any extra threads."""
+        last_file = min(self.current_file + self.prefetch_depth, len(self.files) - 1)
+        while self.last_prefetched_file < last_file:
+            self.last_prefetched_file += 1
+            try:
+                fd = os.open(self.files[self.last_prefetched_file], os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, PREFETCH_SIZE, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                # Any real problem with the file will be reported when it's opened to be read
+                logger.debug(f"Failed to prefetch {self.files[self.last_prefetched_file]}: {e}")
+
+    def _create_tar_info(self, dest_name : str, stat_info : os.stat_result) -> tarfile.TarInfo:
+        """Create the TarInfo for a file from its stat information.
+
+        Args:
+            dest_name: The name of the file within the tarball.
+            stat_info: The file's stat information.
+
+        Return: The TarInfo for the file.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Creating file {dest_name} in tarfile")
+        tar_info = tarfile.TarInfo(name=dest_name)
         tar_info.type = tarfile.REGTYPE
         tar_info.size = stat_info.st_size
-        tar_info.mtime = stat_info.st_mtime
+        # A fractional mtime would need an extra pax header block for each file
+        tar_info.mtime = int(stat_info.st_mtime)
         tar_info.mode = stat.S_IMODE(stat_info.st_mode)
         tar_info.uid = stat_info.st_uid
         tar_info.gid = stat_info.st_gid
-        tar_info.uname = file_path.owner()
-        tar_info.gname = file_path.group()
+        # Path.owner() and Path.group() would stat the file again for each lookup
+        tar_info.uname = _user_name(stat_info.st_uid)
+        tar_info.gname = _group_name(stat_info.st_gid)
         return tar_info
 
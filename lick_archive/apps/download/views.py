@@ -1,10 +1,12 @@
 """The views that make up the lick archive query app."""
 
 import logging
+import os
 logger = logging.getLogger(__name__)
 
 from pathlib import Path
 import json
+import tarfile
 
 from rest_framework.generics import RetrieveAPIView, GenericAPIView
 from rest_framework import status
@@ -25,7 +27,7 @@ from lick_archive.config.archive_config import ArchiveConfigFile
 lick_archive_config = ArchiveConfigFile.load_from_standard_inifile().config
 
 from lick_archive.apps.query.api import QueryAPIFilterBackend, QueryAPIView
-from lick_archive.metadata.data_dictionary import MAX_FILENAME_SIZE, MAX_FILENAME_BATCH
+from lick_archive.metadata.data_dictionary import MAX_FILENAME_SIZE
 
 from lick_archive.apps.download.tarfile_stream import TarFileStream
 
@@ -66,9 +68,8 @@ class DownloadMultiView(QueryAPIView, GenericAPIView):
     """A view for downloading a tarball of multiple files in the archive."""
     filter_backends = [QueryAPIFilterBackend]
     required_attributes = ["filename"]
-    allowed_result_attributes = ["filename","file_size"]
+    allowed_result_attributes = ["filename","file_size","mtime"]
     allowed_sort_attributes = ["filename"]
-    batch_size = MAX_FILENAME_BATCH
     parser_classes = [JSONParser,FormParser]
     serializer_class = DownloadMultiSerializer
     throttle_scope = 'downloads'
@@ -79,31 +80,47 @@ class DownloadMultiView(QueryAPIView, GenericAPIView):
     @method_decorator(never_cache)
     def post(self, request, *args, **kwargs):
         """Handle a post request to download files. The API expects a JSON list
-        of archive filenames."""
+        of archive filenames. The tarball is gzipped unless the "gzip" query parameter is "false"."""
 
         log_request_debug(request)
-        logger.debug(f"Request data: {request.data}")
+        # The request data can be a list of thousands of files, so only format it when it will be logged
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Request data: {request.data}")
         logger.info(f"Received download request.")
         # Valiadate the incomming request.
         file_list = self._validate_json(request)
         logger.info(f"Request contained {len(file_list)} files.")
-        # Validate that the the files in request, and return their full paths.
-        valid_files = self._get_validated_files(file_list)
+        # Validate that the the files in request, and return their full paths and metadata.
+        validated_files = self._get_validated_files(file_list)
+        valid_files = [file for file, metadata in validated_files]
         archive_names = self._get_archive_names(valid_files)
-        tarfile_name = self.get_filename(valid_files[0], valid_files[-1])
+        # Build the tar headers from the database metadata. The stream checks each one against the opened
+        # file and uses the file's own information instead if they don't match, e.g. for a symlink (whose
+        # link rather than target size is in the database) or a file changed since it was ingested.
+        file_infos = [self._get_tar_info(archive_name, metadata) for (file, metadata), archive_name in zip(validated_files, archive_names)]
+        enable_gzip = request.query_params.get("gzip", "true").lower() != "false"
+        tarfile_name = self.get_filename(valid_files[0], valid_files[-1], enable_gzip)
         logger.info(f"Validated {len(valid_files)} files for download, starting tarball stream...")
-        tarball_stream = TarFileStream(tarfile_name,valid_files, arcfiles=archive_names, enable_gzip=True)
+        tarball_stream = TarFileStream(tarfile_name,valid_files, arcfiles=archive_names, enable_gzip=enable_gzip, file_infos=file_infos)
 
-        headers = {"Content-Type":         "application/gzip",
-                   "Content-Disposition": f"attachment; filename={tarfile_name}"}
+        if enable_gzip:
+            headers = {"Content-Type":         "application/gzip",
+                       "Content-Disposition": f"attachment; filename={tarfile_name}"}
+        else:
+            # The size of an uncompressed tarball is known up front, so the client can be told how
+            # large it will be instead of using a chunked response
+            headers = {"Content-Type":         "application/x-tar",
+                       "Content-Length":       str(tarball_stream.tarball_size()),
+                       "Content-Disposition": f"attachment; filename={tarfile_name}"}
         return StreamingHttpResponse(streaming_content=tarball_stream,status=status.HTTP_200_OK,headers=headers)
 
-    def get_filename(self, first_file : Path, last_file : Path):
+    def get_filename(self, first_file : Path, last_file : Path, enable_gzip : bool = True):
         """Create the filename to use for the tarball.
         
         Args:
         first_file: The first file in the sorted list of filenames.
         last_file:   The last file in the sorted list of filenames.
+        enable_gzip: Whether the tarball is gzipped.
         """
 
         date1, instr1 = parse_file_name(first_file)
@@ -118,9 +135,10 @@ class DownloadMultiView(QueryAPIView, GenericAPIView):
             instr_portion = instr1
         else:
             instr_portion = instr1 + "-" + instr2
-        return f"data-{date_portion}-{instr_portion}.tar.gz"
+        extension = ".tar.gz" if enable_gzip else ".tar"
+        return f"data-{date_portion}-{instr_portion}{extension}"
 
-    def _get_archive_names(self, files : list[Path]):
+    def _get_archive_names(self, files : list[Path]) -> list[str]:
         """Create the filenames that will be used in the resulting archive file.
         These are a single level directory name that will preserve the uniqueness of each file,
         even if they are from different nights or instruments.
@@ -131,6 +149,27 @@ class DownloadMultiView(QueryAPIView, GenericAPIView):
             archive_names.append(f"data-{date_str}-{instr}/{file.name}")
         return archive_names
 
+    def _get_tar_info(self, archive_name : str, metadata : dict) -> tarfile.TarInfo|None:
+        """Create the TarInfo for a file from its size and modification time in the database.
+
+        Args:
+        archive_name: The name of the file within the tarball.
+        metadata:     The file's "file_size" and "mtime" from the database.
+
+        Return: The TarInfo, or None if the database doesn't have the file's size or modification time.
+        """
+        if metadata["file_size"] is None or metadata["mtime"] is None:
+            return None
+        tar_info = tarfile.TarInfo(name=archive_name)
+        tar_info.type = tarfile.REGTYPE
+        tar_info.size = metadata["file_size"]
+        # A fractional mtime would need an extra pax header block for each file
+        tar_info.mtime = int(metadata["mtime"].timestamp())
+        # The archive's files are read only for its users, so the owner and permissions of the
+        # files on the archive server aren't included
+        tar_info.mode = 0o444
+        return tar_info
+
     def _validate_json(self, request):
         """Validate the passed in JSON.
         The DRF JSONParser will validate that the request is JSON formatted,
@@ -170,55 +209,57 @@ class DownloadMultiView(QueryAPIView, GenericAPIView):
                 raise ParseError(detail=f"List of filename contained empty filename at index {i}")
         return file_list
     
-    def _get_validated_files(self, files : list[str]) -> list[Path]:
+    def _get_validated_files(self, files : list[str]) -> list[tuple[Path,dict]]:
         """Validate the incomming list of files. This ensures that the files exist,
         that the user is authorized to receive them, and that maximum size
-        constraints are met."""
+        constraints are met.
+        
+        Return: The full path of each file, along with its metadata from the database.
+        """
         
-        next_index = 0
         resulting_files = []
         total_size = 0
         # The maximum size in the config file is specified in MiB
         maximum_size = lick_archive_config.download.max_tarball_size * (2**20)
 
-        # Go through the passed in files in batches, sorting each batch for comparison against
-        # a sorted query on the file names.
-        while next_index < len(files):
-            next_batch = files[next_index:next_index+self.batch_size]
-            if len(next_batch) > 0:
-
-                # Prepare a queryset to find the given files, using the Query app's API
-                # to properly filter and handle proprietary access
-                self.request.validated_query = {"filename": ["in", next_batch],
-                                                "sort": ['id'],
-                                                "count": False }
-
-                queryset = self.filter_queryset(self.get_queryset())
-                queryset = queryset.values(*self.allowed_result_attributes)
-
-                # Get the next batch of results
-                logger.debug(f"querying {next_index}:{next_index+self.batch_size}")
-                results = queryset[0:self.batch_size]
-                logger.debug(f"Results: {results}")
-
-                # Make sure each desired file was found, and make sure we don't exceed the maximum allowed combined file size
-
-                # Map of filenames returned from the db with their file sizes
-                found_file_sizes = {Path(result['filename']): result['file_size'] for result in results}
-
-                for file in next_batch:
-                    full_path = Path(lick_archive_config.ingest.archive_root_dir, file)
-                    logger.debug(f"Looking for {full_path}")
-                    if full_path not in found_file_sizes:
-                        logger.info(f"Could not find {full_path} in results.")
-                        raise NotFound(detail=f"Filename {file} was not found in the archive or the user does not have permissions to download it.")
-
-                    total_size += found_file_sizes[full_path]
-                    if total_size > maximum_size:
-                        logger.info(f"Total file sizes {total_size} exceeded maximum size {maximum_size}")
-                        raise APIException(detail=f"Total size of all files exceeded maximum of {lick_archive_config.download.max_tarball_size} MiB")
-                    resulting_files.append(full_path)
-            next_index += self.batch_size
+        # Prepare a queryset to find all of the given files in one query, using the Query app's API
+        # to properly filter and handle proprietary access. The number of files was already limited
+        # by _validate_json
+        self.request.validated_query = {"filename": ["in", files],
+                                        "sort": ['id'],
+                                        "count": False }
+
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*self.allowed_result_attributes)
+
+        # Only format the results and file names when they will be logged
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        logger.debug(f"querying {len(files)} files")
+        results = queryset[0:len(files)]
+        if debug_enabled:
+            logger.debug(f"Results: {results}")
+
+        # Map of filenames returned from the db with their metadata. The filter matched the full filenames
+        # built with os.path.join, so the same strings are used to look up the results, rather than
+        # building a Path for every file
+        found_files = {result['filename']: result for result in results}
+        archive_root_dir = lick_archive_config.ingest.archive_root_dir
+
+        # Make sure each desired file was found, and make sure we don't exceed the maximum allowed combined file size
+        for file in files:
+            full_filename = os.path.join(archive_root_dir, file)
+            if debug_enabled:
+                logger.debug(f"Looking for {full_filename}")
+            metadata = found_files.get(full_filename)
+            if metadata is None:
+                logger.info(f"Could not find {full_filename} in results.")
+                raise NotFound(detail=f"Filename {file} was not found in the archive or the user does not have permissions to download it.")
+
+            total_size += metadata['file_size']
+            if total_size > maximum_size:
+                logger.info(f"Total file sizes {total_size} exceeded maximum size {maximum_size}")
+                raise APIException(detail=f"Total size of all files exceeded maximum of {lick_archive_config.download.max_tarball_size} MiB")
+            resulting_files.append((Path(full_filename), metadata))
 
         return resulting_files
 
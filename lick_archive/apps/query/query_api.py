@@ -513,12 +513,15 @@ class QueryAPIFilterBackend:
 class QueryAPIView:
     """Baseclass for views using the archive's QueryAPI to find/authorize access to files/file metadata."""
 
+    # How long (in seconds) to cache count queries, or None to not cache them
+    count_cache_timeout = None
+
     def __init__(self, db_engine, table):
         self._db_engine = db_engine
         self._table = table
 
     def get_queryset(self):
-        return SQLAlchemyQuerySet(self._db_engine, self._table)
+        return SQLAlchemyQuerySet(self._db_engine, self._table, count_cache_timeout=self.count_cache_timeout)
 
     def get_object(self):
         log_request_debug(self.request)
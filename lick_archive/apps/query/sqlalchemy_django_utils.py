@@ -8,10 +8,12 @@ logger = logging.getLogger(__name__)
 import enum
 from collections.abc import Mapping
 import copy
+import hashlib
 
 from sqlalchemy import select, func, or_, not_
 from sqlalchemy.orm import Relationship
 from django.db.models import F, Q
+from django.core.cache import cache
 
 from rest_framework.exceptions import APIException
 from rest_framework.serializers import ValidationError, BaseSerializer
@@ -86,11 +88,18 @@ class SQLAlchemyQuerySet:
     sort_attributes (list of sqlalchemy.schema.Column):
     The attributes to sort the results of the query by.
 
+    count_cache_timeout (int or None):
+    How long (in seconds) to cache the results of count queries in the Django cache. None
+    disables caching counts.
+
     """
     def __init__(self, db_engine, sql_alchemy_table, result_attributes=[],
-                 where_filters = [], sort_attributes=[], joins=set()):
+                 where_filters = [], sort_attributes=[], joins=set(), count_cache_timeout=None):
         self._db_engine = db_engine
         self._sql_alchemy_table = sql_alchemy_table
+
+        # How long to cache count results, if at all
+        self.count_cache_timeout = count_cache_timeout
         
         # The SQL Alchemy attributes to return as results
         self.result_attributes = result_attributes
@@ -261,7 +270,8 @@ class SQLAlchemyQuerySet:
                                              result_attributes=self.result_attributes, 
                                              where_filters=self.where_filters,
                                              joins=self.joins, 
-                                             sort_attributes=[])
+                                             sort_attributes=[],
+                                             count_cache_timeout=self.count_cache_timeout)
 
         logger.debug(f"Ordering by {sort_fields}")
         if isinstance(sort_fields, str):
@@ -320,7 +330,8 @@ class SQLAlchemyQuerySet:
                                              result_attributes=self.result_attributes, 
                                              where_filters=copy.copy(self.where_filters), 
                                              sort_attributes=self.sort_attributes,
-                                             joins=copy.copy(self.joins))
+                                             joins=copy.copy(self.joins),
+                                             count_cache_timeout=self.count_cache_timeout)
         for expression in args:
             if not isinstance(expression, Q):
                 logger.error(f"Unknown Q expression {expression}")
@@ -357,7 +368,8 @@ class SQLAlchemyQuerySet:
         return_queryset = SQLAlchemyQuerySet(db_engine=self._db_engine, sql_alchemy_table=self._sql_alchemy_table,
                                              result_attributes=[], 
                                              where_filters=self.where_filters, 
-                                             sort_attributes=self.sort_attributes)
+                                             sort_attributes=self.sort_attributes,
+                                             count_cache_timeout=self.count_cache_timeout)
         
         joins = set()
         for field in fields:
@@ -423,6 +435,10 @@ class SQLAlchemyQuerySet:
 
             logger.debug(f"Getting {limit} query results starting at index {key.start if key.start is not None else 0}")
 
+        # Compiling the statement for a debug message is as expensive as compiling it to run,
+        # and isn't cached. So only do so when the message will be logged
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
         # Start building the SLQAlchemy query statement to be run against the database.
         try:
             # Result attributes
@@ -432,18 +448,21 @@ class SQLAlchemyQuerySet:
                 stmt = select(self._sql_alchemy_table)
 
             if len(self.joins) > 0:
-                logger.debug(f"SQL Before joins: {stmt.compile()}")
+                if debug_enabled:
+                    logger.debug(f"SQL Before joins: {stmt.compile()}")
                 # We always do outer joins now because that's correct for UserDataAccess, which
                 # is the only join we need for the archive. But if other tables are added in the
                 # future it might be wrong.
                 for join_relationship in self.joins:
                     stmt = stmt.outerjoin(join_relationship)
     
-            logger.debug(f"SQL Before where: {stmt.compile()}")
+            if debug_enabled:
+                logger.debug(f"SQL Before where: {stmt.compile()}")
             # Build up the where statement, joined by ANDs
             for filter in self.where_filters:
                 stmt = stmt.where(filter)
-                logger.debug(f"SQL after adding where clause: {stmt.compile()}")
+                if debug_enabled:
+                    logger.debug(f"SQL after adding where clause: {stmt.compile()}")
 
             # Add the order by clause
             stmt = stmt.order_by(*self.sort_attributes)
@@ -451,7 +470,8 @@ class SQLAlchemyQuerySet:
             # Add a limit for pagination
             if limit is not None:
                 stmt = stmt.limit(limit)
-            logger.debug(f"SQL after adding limit: {stmt.compile()}")
+            if debug_enabled:
+                logger.debug(f"SQL after adding limit: {stmt.compile()}")
         except Exception as e:
             logger.error(f"Error when building query: {e}", exc_info=True)
             raise APIException(detail="Failed to build query.")
@@ -485,16 +505,20 @@ class SQLAlchemyQuerySet:
         Raises:
         APIException: Thrown for errors building the query statement or running the query against the database.
         """
+        # Only compile the statement for debug messages when they will be logged
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         try:
             # Build the count statement
             stmt = select(func.count())
 
             if len(self.joins) > 0:
-                logger.debug(f"SQL Before joins: {stmt.compile()}")
+                if debug_enabled:
+                    logger.debug(f"SQL Before joins: {stmt.compile()}")
                 for join_relationship in self.joins:
                     stmt = stmt.outerjoin(join_relationship)
 
-            logger.debug(f"SQL Before where: {stmt.compile()}")
+            if debug_enabled:
+                logger.debug(f"SQL Before where: {stmt.compile()}")
 
             if len(self.where_filters) == 0:
                 # SQL Alchemy can't infer the table if there are no filters.
@@ -503,16 +527,43 @@ class SQLAlchemyQuerySet:
                 # Build up the where statement, joined by ANDs
                 for filter in self.where_filters:
                     stmt = stmt.where(filter)
-            logger.debug(f"SQL after adding where clause: {stmt.compile()}")
+            if debug_enabled:
+                logger.debug(f"SQL after adding where clause: {stmt.compile()}")
+
+            if self.count_cache_timeout is not None:
+                cache_key = self._count_cache_key(stmt)
         except Exception as e:
             logger.error(f"Error when building count query: {e}", exc_info=True)
             raise APIException(detail="Failed to build count query.")
 
+        if self.count_cache_timeout is not None:
+            result = cache.get(cache_key)
+            if result is not None:
+                return result
+
         # Run the count statement
         try:
             with open_db_session(self._db_engine) as session:
                 result = execute_db_statement(session, stmt).scalar()
-                return result
         except Exception as e:
             logger.error(f"Failed to run archive database count query: {e}", exc_info=True)
             raise APIException(detail="Failed to run count query on archive database.")
+
+        if self.count_cache_timeout is not None:
+            cache.set(cache_key, result, self.count_cache_timeout)
+        return result
+
+    def _count_cache_key(self, stmt):
+        """Return the cache key for a count statement. The key is built from the database, the
+        SQL, and the values bound to it (which include the user the query is authorized for), so that
+        only identical counts share a cache entry.
+
+        Args:
+        stmt (sqlalchemy.sql.expression.Select): The count statement.
+
+        Return (str): The cache key.
+        """
+        compiled = stmt.compile()
+        params = sorted((name, type(value).__name__, str(value)) for name, value in compiled.params.items())
+        key_source = f"{self._db_engine.url}\n{compiled}\n{params}"
+        return "query.count:" + hashlib.blake2b(key_source.encode(), digest_size=16).hexdigest()
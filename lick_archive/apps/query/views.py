@@ -3,7 +3,9 @@
 import logging
 logger = logging.getLogger(__name__)
 
+from collections.abc import Sequence
 from pathlib import Path
+import re
 
 from astropy.coordinates import Angle
 from astropy import units
@@ -29,6 +31,13 @@ from .query_api import QueryAPIFilterBackend, QueryAPIPagination, QuerySerialize
 _db_engine = create_db_engine(user=lick_archive_config.database.db_query_user, database=lick_archive_config.database.archive_db)
 
 
+_explicit_units = re.compile("[hdms]", re.IGNORECASE)
+
+def _has_explicit_units(angle_value: str) -> bool:
+    """Return whether a sexagesimal angle string has explicit units (e.g. "12h30m10s")."""
+    return _explicit_units.search(angle_value) is not None
+
+
 class QueryView(QueryAPIView, ListAPIView):
     """View that integrates the archive Query API with SQL Alchemy"""
     pagination_class = QueryAPIPagination
@@ -37,6 +46,9 @@ class QueryView(QueryAPIView, ListAPIView):
     required_attributes = list(api_capabilities['required']['db_name'])
     allowed_sort_attributes = list(api_capabilities['sort']['db_name'])
     allowed_result_attributes = list(api_capabilities['result']['db_name'])
+    # Paging through results counts the same query on every page, so briefly cache the counts.
+    # Newly ingested files can take this long to show up in counts.
+    count_cache_timeout = 30
 
 
     def __init__(self):
@@ -82,6 +94,14 @@ class QueryView(QueryAPIView, ListAPIView):
             if 'results' in response.data:
 
                 coord_format = request.validated_query.get("coord_format", "asis")
+                if coord_format != "asis":
+                    # Convert the ra and dec columns as a whole, which is much faster than converting
+                    # them one value at a time
+                    for field, hour_angle in (("ra", True), ("dec", False)):
+                        records = [record for record in response.data['results'] if field in record]
+                        converted_values = self._convertAngles([record[field] for record in records], coord_format, hour_angle=hour_angle)
+                        for record, value in zip(records, converted_values):
+                            record[field] = value
 
                 # Filter header URLS to have the propper format,
                 # to make filename a relative path, and to make header download_link
@@ -99,12 +119,55 @@ class QueryView(QueryAPIView, ListAPIView):
                         relative_path = filepath.relative_to(lick_archive_config.ingest.archive_root_dir)
                         download_url = lick_archive_config.download.file_download_url_format.format(relative_path)
                         record["download_link"] = download_url
-                    if coord_format != "asis":
-                        if "ra" in record:
-                            record["ra"] = self._convertAngle(record["ra"], coord_format, hour_angle=True)
-                        if "dec" in record:
-                            record["dec"] = self._convertAngle(record["dec"], coord_format, hour_angle=False)
         return response
+
+    def _convertAngles(self, angle_values:Sequence[str], coord_format: str, hour_angle:bool = False) -> Sequence[str]:
+        """Convert a list of returned angle values to the requested format. This gives the same results
+        as calling :meth:`_convertAngle` on each value, but creates one astropy Angle for all of the decimal values
+        and one for all of the sexagesimal values.
+
+        Args:
+            angle_values: The angle values from the database (originally from the FITS header)
+            coord_format: The requested format, one of "hmsdms" or "degrees".
+            hour_angle:  True if these values should be treated as hour angles, False if should be treated as degrees. Only applicable if the coord_format is "hmsdms".
+
+        Return Value:
+            The converted angle values.
+        """
+        converted_values = list(angle_values)
+
+        # Group the values by the unit used to parse them
+        decimal_indices = []
+        decimal_values = []
+        sexagesimal_indices = []
+        sexagesimal_values = []
+        for i, angle_value in enumerate(angle_values):
+            try:
+                decimal_values.append(float(angle_value))
+                decimal_indices.append(i)
+            except Exception:
+                if not isinstance(angle_value, str) or _has_explicit_units(angle_value):
+                    # Values with explicit units are rare, convert them individually
+                    converted_values[i] = self._convertAngle(angle_value, coord_format, hour_angle)
+                else:
+                    sexagesimal_indices.append(i)
+                    sexagesimal_values.append(angle_value)
+
+        sexagesimal_unit = units.hourangle if hour_angle else units.deg
+        for indices, values, unit in ((decimal_indices, decimal_values, units.deg), (sexagesimal_indices, sexagesimal_values, sexagesimal_unit)):
+            if len(values) == 0:
+                continue
+            try:
+                angles = Angle(values, unit=unit)
+            except Exception:
+                # Convert the values individually, so only the ones that can't be converted are left asis
+                for i in indices:
+                    converted_values[i] = self._convertAngle(angle_values[i], coord_format, hour_angle)
+                continue
+            for i, angle_string in zip(indices, self._formatAngle(angles, coord_format, hour_angle)):
+                converted_values[i] = str(angle_string)
+
+        return converted_values
     
     def _convertAngle(self, angle_value:str, coord_format: str, hour_angle:bool = False):
         """Convert a returned angle value to the requested format.
@@ -124,7 +187,7 @@ class QueryView(QueryAPIView, ListAPIView):
         except Exception:
             # Next try to treat it as sexagesimal
             try:
-                if any([c in "hdms" for c in angle_value.lower()]):
+                if _has_explicit_units(angle_value):
                     # There are explicit units
                     angle = Angle(angle_value)
                 elif hour_angle:
@@ -135,6 +198,10 @@ class QueryView(QueryAPIView, ListAPIView):
                 logger.error(f"Could not convert angle value {angle_value}, leaving asis")
                 return angle_value
 
+        return self._formatAngle(angle, coord_format, hour_angle)
+
+    def _formatAngle(self, angle: Angle, coord_format: str, hour_angle:bool = False):
+        """Format an astropy Angle in the requested format. If the Angle is an array, an array of strings is returned."""
         # Use astropy the convert to the desired format
         if hour_angle and coord_format == "hmsdms":
             output_unit = units.hourangle
@@ -2,6 +2,7 @@ import logging
 from datetime import datetime, date
 import os
 import requests
+from requests.adapters import HTTPAdapter
 
 from tenacity import Retrying, stop_after_delay, wait_exponential
 
@@ -11,6 +12,19 @@ from astropy.coordinates import Angle
 
 from lick_archive.db import archive_schema
 
+# Connections to the archive are pooled across all clients, so that a client created for each request
+# to a frontend can reuse an open connection rather than making a new one (with a new TLS handshake).
+_shared_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+
+def _new_session():
+    """Create a requests Session that uses the shared connection pool. Each client has its own
+    session so that login cookies aren't shared between clients. The session should not be closed,
+    as that would close the shared pool."""
+    session = requests.Session()
+    session.mount("https://", _shared_adapter)
+    session.mount("http://", _shared_adapter)
+    return session
+
 class LickArchiveClient:
     """Client for the Lick Searchable Archive's REST API
     
@@ -40,7 +54,7 @@ class LickArchiveClient:
         self.ssl_verify = ssl_verify
         self._csrf_middleware_token = None
         self.logged_in_user = None
-        self._session = requests.Session()
+        self._session = _new_session()
 
         if request is not None:
             # Transfer any persisted login information in a remote frontend scenario
@@ -56,7 +70,7 @@ class LickArchiveClient:
                     except Exception as e:
                         self._csrf_middleware_token = None
                         self.logged_in_user = None
-                        self._session = requests.Session()
+                        self._session = _new_session()
                         logger.error(f"Failed to read login information from session, using a new session.",exc_info=True)                    
             # In a local frontend scenarion, use the cookies in our request
             else:
@@ -13,7 +13,6 @@ from astropy.coordinates import SkyCoord
 
 
 from lick_archive.db.pgsphere import SPoint
-from lick_archive.db.bitstring import BitString
 from lick_archive.metadata.data_dictionary import data_dictionary, IngestFlags, LargeInt, LargeStr, MAX_PUBLIC_DATE
 
 
@@ -37,7 +36,7 @@ def _map_type(python_type):
                 datetime:    TIMESTAMP(timezone=True),
                 date:        Date,
                 SkyCoord:    SPoint,
-                IngestFlags: BitString,
+                IngestFlags: Integer,
                 LargeInt:    BigInteger,
                 LargeStr:    Text,
                 }
@@ -63,11 +62,33 @@ class FileMetadata(Base):
     __table__ = file_metadata
     user_access: Mapped[List["UserDataAccess"]] = relationship(back_populates="file_metadata",cascade="all, delete-orphan")    
 
+    @property
+    def ingest_flags_bits(self) -> str | None:
+        """The ingest flags as a 32 character bit string, the format they were stored in before being
+        stored as an integer."""
+        if self.ingest_flags is None:
+            return None
+        return f'{self.ingest_flags:032b}'
+
 Index('index_m_obs_date', FileMetadata.obs_date)
-Index('index_m_instrument', FileMetadata.instrument)
+# Queries by instrument are almost always also by date range, and the instrument leading column
+# still serves instrument only queries. obs_date keeps its own index for queries across instruments.
+Index('index_m_instr_date', FileMetadata.instrument, FileMetadata.obs_date)
 Index('index_m_object', FileMetadata.object)
 Index('index_m_frame', FileMetadata.frame_type)
-Index('index_m_coord', FileMetadata.coord, postgresql_using='gist')
+index_m_coord = Index('index_m_coord', FileMetadata.coord, postgresql_using='gist')
+
+def set_coord_index_method(method : str):
+    """Set the PostgreSQL index method used for the coord index when creating the schema.
+    SP-GiST indexes are smaller and faster to search for point data, but require a pgsphere version 
+    that provides an SP-GiST operator class for spoint.
+
+    Args:
+        method: The index method, either "gist" or "spgist".
+    """
+    if method not in ("gist", "spgist"):
+        raise ValueError(f"Unsupported coord index method {method}, must be 'gist' or 'spgist'.")
+    index_m_coord.dialect_options['postgresql']['using'] = method
 
 
 class UserDataAccess(Base):
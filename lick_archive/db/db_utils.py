@@ -5,7 +5,11 @@ Helper functions for working with databases via SQL Alchemy
 from collections.abc import Iterator, Sequence, Mapping
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from enum import Enum
+from itertools import groupby
 from typing import Callable
+import csv
+import io
 
 from sqlalchemy import create_engine, Engine, select, func, inspect, update, delete, insert, Result
 from sqlalchemy.orm import Session
@@ -14,6 +18,7 @@ import psycopg2
 from tenacity import retry, stop_after_delay, wait_exponential, retry_if_not_exception_type, after_log
 
 from lick_archive.db.archive_schema import FileMetadata, UserDataAccess
+from lick_archive.db.pgsphere import SPoint
 
 import logging
 logger = logging.getLogger(__name__)
@@ -53,8 +58,14 @@ class BatchedDBOperation():
         retry=False
         with open_db_session(self.engine) as session:
             try:
-                for callable, kwargs, op_type in self._batch:
-                    callable(session, **kwargs)
+                # Each run of consecutive inserts is sent as one multi-row INSERT, everything else is
+                # run individually. The operations are run in the order they were queued.
+                for is_insert, operations in groupby(self._batch, key=lambda operation: operation[2] == "insert"):
+                    if is_insert:
+                        insert_batch(session, [file_metadata_to_dict(kwargs["row"]) for callable, kwargs, op_type in operations])
+                    else:
+                        for callable, kwargs, op_type in operations:
+                            callable(session, **kwargs)
                 session.commit()
                 self.success+=len(self._batch)
             except Exception as e:
@@ -70,21 +81,27 @@ class BatchedDBOperation():
         self._batch = []
   
     def _retry_batch(self):
-        # Start with a new session
+        # Retry each operation individually, using one new session with a savepoint per operation
+        # so that a failure only rolls back that operation
+        retried = []
         try:
-            for callable, kwargs, op_type in self._batch:            
-                with open_db_session(self.engine) as session:
+            with open_db_session(self.engine) as session:
+                for callable, kwargs, op_type in self._batch:            
                     try:
-                        callable(session, **kwargs)
-                        session.commit()
-                        self.success += 1
-                        self.success_retries += 1
+                        with session.begin_nested():
+                            callable(session, **kwargs)
+                        retried.append((kwargs["row"].filename, op_type))
                     except Exception as e:
                         self.failures.append((kwargs["row"].filename,op_type,f"{e.__class__.__name__}: {e}"))
                         logger.error("Failed retrying individual operation.", exc_info=True)
-                        session.rollback()
+                session.commit()
         except Exception as e:
             logger.error("Failed retrying entire batch.", exc_info=True)
+            # The operations that succeeded individually were never committed, so they failed too
+            self.failures += [(filename, op_type, f"{e.__class__.__name__}: {e}") for filename, op_type in retried]
+            return
+        self.success += len(retried)
+        self.success_retries += len(retried)
 
 
 @retry(reraise=True, stop=stop_after_delay(60), wait=wait_exponential(multiplier=1, min=4, max=10), after=after_log(logger, logging.DEBUG))
@@ -97,8 +114,15 @@ def create_db_engine(user='archive', database='archive',url=None):
     else:
         connection_url= url
 
+    engine_kwargs = {}
+    if connection_url.startswith("postgresql"):
+        # Have psycopg2 send executemany() style inserts/updates as multi-row statements
+        # rather than one statement per row
+        engine_kwargs["executemany_mode"] = "values_plus_batch"
+        engine_kwargs["insertmanyvalues_page_size"] = 1000
+
     logger.debug("Connecting to database")
-    engine = create_engine(connection_url)
+    engine = create_engine(connection_url, **engine_kwargs)
     logger.debug("Connected to database")
     return engine
 
@@ -123,6 +147,127 @@ def insert_file_metadata(session : Session, row : FileMetadata):
     session.add(row)
     logger.debug("Row inserted")
 
+def file_metadata_to_dict(row : FileMetadata) -> dict:
+    """Convert a row of metadata to a plain dict of column values for :func:`insert_batch` and :func:`copy_batch`.
+    The dict is much smaller than the ORM object, and is cheaper to hold in large batches or to
+    pass between processes.
+
+    Args:
+        row: The metadata to convert.
+
+    Return: 
+        A dict keyed by column name (without the id). The user access information is stored under
+        the "user_access" key, as a list of dicts with "obid" and "reason".
+    """
+    values = {c.name: getattr(row, c.name) for c in FileMetadata.__table__.columns if c.name != "id"}
+    values["user_access"] = [{"obid": uda.obid, "reason": uda.reason} for uda in row.user_access]
+    return values
+
+def insert_batch(session : Session, rows : Sequence[Mapping]):
+    """
+    Insert multiple rows of metadata using a single multi-row INSERT statement, along with
+    any user access information for those rows. This avoids the per-row round trips of adding
+    each ORM object to the session. The caller is responsible for committing the session.
+
+    Unlike :func:`insert_file_metadata` this runs SQL in the caller's transaction, so it is not
+    retried: after a failure the transaction must be rolled back by the caller before anything
+    can succeed. Errors such as duplicate filenames are raised immediately.
+
+    Args:
+        session: The SQLAlchemy session to insert with.
+        rows:    The metadata rows to insert, as returned by :func:`file_metadata_to_dict`.
+    """
+    logger.debug(f"Inserting batch of {len(rows)} rows.")
+    attributes = [c.name for c in FileMetadata.__table__.columns if c.name != "id"]
+    values = [{attr: row[attr] for attr in attributes} for row in rows]
+
+    # The returned ids are in the same order as the passed in values, so they can be matched
+    # up with the user access information for each row.
+    stmt = insert(FileMetadata).returning(FileMetadata.id, sort_by_parameter_order=True)
+    ids = session.scalars(stmt, values).all()
+
+    uda_values = [{"file_id": id, **uda} for id, row in zip(ids, rows) for uda in row["user_access"]]
+    if len(uda_values) > 0:
+        session.execute(insert(UserDataAccess), uda_values)
+    logger.debug("Batch inserted")
+
+_COPY_NULL = "\\N"
+
+def _copy_value(value):
+    """Format a metadata value for a PostgreSQL CSV COPY.
+
+    Args:
+        value (Any): The value from a FileMetadata attribute.
+
+    Return (str): The value as text, or the NULL marker used by :func:`copy_batch`.
+    """
+    if value is None:
+        return _COPY_NULL
+    elif isinstance(value, Enum):
+        return value.value
+    elif isinstance(value, SPoint):
+        if value.ra is None or value.dec is None:
+            return _COPY_NULL
+        # pgsphere's text input format, in radians
+        return f"({value.ra},{value.dec})"
+    return value
+
+_COPY_STAGE_TABLE = "file_metadata_copy_stage"
+
+def copy_batch(session : Session, rows : Sequence[Mapping], skip_existing : bool = False) -> set[str]:
+    """
+    Insert multiple rows of metadata using PostgreSQL's COPY FROM STDIN, which avoids the
+    per statement parsing and planning overhead of INSERTs. This is intended for the append
+    only bulk ingest, and requires a psycopg2 connection. The user access information for the
+    rows is inserted afterwards, using the ids assigned to the copied rows. The caller is
+    responsible for committing the session.
+
+    Args:
+        session:       The SQLAlchemy session to insert with.
+        rows:          The metadata rows to insert, as returned by :func:`file_metadata_to_dict`.
+        skip_existing: If True, rows with a filename already in the database are skipped
+                       rather than failing the batch. The rows are copied to a temporary
+                       table and then inserted with ON CONFLICT DO NOTHING, so this avoids
+                       checking each file individually.
+
+    Return: The filenames of the inserted rows.
+    """
+    logger.debug(f"Copying batch of {len(rows)} rows.")
+    attributes = [c.name for c in FileMetadata.__table__.columns if c.name != "id"]
+    column_list = ','.join(attributes)
+    table_name = FileMetadata.__table__.name
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_copy_value(row[attr]) for attr in attributes] for row in rows)
+    buffer.seek(0)
+
+    copy_options = f"WITH (FORMAT csv, NULL '{_COPY_NULL}')"
+    dbapi_connection = session.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        if skip_existing:
+            cursor.execute(f"CREATE TEMPORARY TABLE {_COPY_STAGE_TABLE} AS SELECT {column_list} FROM {table_name} WITH NO DATA")
+            cursor.copy_expert(f"COPY {_COPY_STAGE_TABLE} ({column_list}) FROM STDIN {copy_options}", buffer)
+            cursor.execute(f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {_COPY_STAGE_TABLE} "
+                           f"ON CONFLICT (filename) DO NOTHING RETURNING filename, id")
+            inserted_ids = dict(cursor.fetchall())
+            cursor.execute(f"DROP TABLE {_COPY_STAGE_TABLE}")
+        else:
+            cursor.copy_expert(f"COPY {table_name} ({column_list}) FROM STDIN {copy_options}", buffer)
+            inserted_ids = None
+
+    inserted = set(row["filename"] for row in rows) if inserted_ids is None else set(inserted_ids.keys())
+
+    rows_with_access = {row["filename"]: row for row in rows if len(row["user_access"]) > 0 and row["filename"] in inserted}
+    if len(rows_with_access) > 0:
+        if inserted_ids is None:
+            # COPY can't return the generated ids, so look them up by the unique filename
+            inserted_ids = dict(session.execute(select(FileMetadata.filename, FileMetadata.id).where(FileMetadata.filename.in_(list(rows_with_access.keys())))).all())
+        uda_values = [{"file_id": inserted_ids[filename], **uda} for filename, row in rows_with_access.items() for uda in row["user_access"]]
+        session.execute(insert(UserDataAccess), uda_values)
+    logger.debug("Batch copied")
+    return inserted
+
 @retry(retry=retry_if_not_exception_type(psycopg2.IntegrityError) & retry_if_not_exception_type(psycopg2.ProgrammingError), reraise=True, stop=stop_after_delay(60), wait=wait_exponential(multiplier=1, min=4, max=10), after=after_log(logger, logging.DEBUG))
 def update_file_metadata(session : Session, id: int, row : FileMetadata, user_access:Sequence[UserDataAccess]):
     """
@@ -153,14 +298,15 @@ def update_file_metadata(session : Session, id: int, row : FileMetadata, user_ac
         session.execute(stmt)
         logger.debug(f"Deleted old user access information, now adding  {len(user_access)} entries...")
 
-        for user_data_access in user_access:
+        # Insert all of the entries with one executemany rather than a statement per entry
+        uda_values = [{"file_id": id, "obid": user_data_access.obid, "reason": user_data_access.reason} for user_data_access in user_access]
+        if len(uda_values) > 0:
             try:
-                stmt = insert(UserDataAccess).values(file_id=id, obid=user_data_access.obid, reason=user_data_access.reason)
-                logger.debug(f"Running SQL: {stmt.compile()}")
-                session.execute(stmt)
+                session.execute(insert(UserDataAccess), uda_values)
             except Exception as e:
-                logger.error(f"Failed to insert new user data access for id {id}", exc_info=True)                
-                logger.error(f"Values for failed isert are: file_id: '{id}' obid: '{user_data_access.obid}' reason: '{user_data_access.reason}'")
+                logger.error(f"Failed to insert new user data access for id {id}", exc_info=True)
+                valuestr = ", ".join([f"(obid: '{uda['obid']}' reason: '{uda['reason']}')" for uda in uda_values])
+                logger.error(f"Values for failed insert are: file_id: '{id}' {valuestr}")
                 raise
         logger.debug("User access information updated.")
 
@@ -182,6 +328,22 @@ def check_exists(engine, column, expression, session = None):
     logger.debug(f"Exists SQL complete. Result {result}")
     return result
 
+@retry(retry=retry_if_not_exception_type(psycopg2.IntegrityError) & retry_if_not_exception_type(psycopg2.ProgrammingError), reraise=True, stop=stop_after_delay(60), wait=wait_exponential(multiplier=1, min=4, max=10), after=after_log(logger, logging.DEBUG))
+def find_existing_files(session : Session, filenames : Sequence[str]) -> set[str]:
+    """
+    Find which of a batch of files have already been inserted, using one query
+    rather than calling :func:`check_exists` for each file.
+
+    Args:
+        session:   The SQLAlchemy session to query with.
+        filenames: The filenames to look for.
+
+    Return: The filenames that are already in the database.
+    """
+    stmt = select(FileMetadata.filename).where(FileMetadata.filename.in_(filenames))
+    logger.debug(f"Checking {len(filenames)} files for existing metadata.")
+    return set(session.scalars(stmt).all())
+
 @retry(retry=retry_if_not_exception_type(psycopg2.IntegrityError) & retry_if_not_exception_type(psycopg2.ProgrammingError), reraise=True, stop=stop_after_delay(60), wait=wait_exponential(multiplier=1, min=4, max=10), after=after_log(logger, logging.DEBUG))
 def execute_db_statement(session, stmt):    
 
@@ -4,6 +4,8 @@ This datatype allows sptial index support for RA/DEC cone searches.
 import logging
 
 import math
+import re
+from functools import lru_cache
 
 from sqlalchemy import func, bindparam, String,type_coerce
 from sqlalchemy.types import  UserDefinedType, TypeDecorator, CHAR
@@ -13,6 +15,41 @@ import astropy.units
 
 logger = logging.getLogger(__name__)
 
+# Plain "[+|-]DD:MM:SS.S" or "[+|-]DD MM SS.S" values, which can be converted without astropy
+_SEXAGESIMAL_RE = re.compile(r"\s*([+-]?)(\d+)[:\s](\d+)[:\s](\d+(?:\.\d*)?)\s*")
+
+
+# Exposures in a night often share the same pointing, so the results are cached
+@lru_cache(maxsize=4096)
+def _sexagesimal_to_degrees(value : str, hours : bool) -> float:
+    """Convert a sexagesimal angle to degrees, as described in :meth:`SPoint.convert_sexagesimal`."""
+
+    # Fast path for the common case of well formed values with no units. Creating an
+    # astropy Angle is much slower than the arithmetic.
+    match = _SEXAGESIMAL_RE.fullmatch(value)
+    if match is not None:
+        whole = int(match.group(2))
+        minutes = int(match.group(3))
+        seconds = float(match.group(4))
+        # Out of range values are left to astropy, to be normalized or rejected
+        if minutes < 60 and seconds < 60.0 and (whole < 24 or not hours):
+            result = whole + minutes/60.0 + seconds/3600.0
+            if match.group(1) == "-":
+                result = -result
+            return result * 15.0 if hours else result
+
+    if hours is False or any([c in "hdms" for c in value.lower()]):
+        # It either should be in degrees, or is explicitly giving its units
+        # Use Astropy Angle to convert it to degrees.
+        # Astropy Angle will also deal with weird coordinates, like 60 as the seconds
+        angle = Angle(value, unit=astropy.units.deg)
+    else:
+        # It doesn't specify units, and should be in hours
+        # Parse the angle as a hour angle, and covnert it to degrees
+        angle = Angle(Angle(value, unit=astropy.units.hourangle), astropy.units.deg)
+
+    return angle.value
+
 
 class SPoint(UserDefinedType):
     """ SQLAlchemy user defined type for the pgsphere SPoint datatype. This
@@ -86,18 +123,8 @@ class SPoint(UserDefinedType):
 
         if value is None:
             return None
-        
-        if hours is False or any([c in "hdms" for c in value.lower()]):
-            # It either should be in degrees, or is explicitly giving its units
-            # Use Astropy Angle to convert it to degrees.
-            # Astropy Angle will also deal with weird coordinates, like 60 as the seconds
-            angle = Angle(value, unit=astropy.units.deg)
-        else:
-            # It doesn't specify units, and should be in hours
-            # Parse the angle as a hour angle, and covnert it to degrees
-            angle = Angle(Angle(value, unit=astropy.units.hourangle), astropy.units.deg)
 
-        return angle.value
+        return _sexagesimal_to_degrees(value, hours)
 
     def coerce_compared_value(self, op, value):
         """Coerce the type of a value that is being compared against an SPoint.
@@ -129,7 +156,8 @@ class SPoint(UserDefinedType):
         Return (Function): The parameter wrapped in a "spoint" function.
         """
         value = bindvalue.effective_value
-        logger.debug(f"SPoint bindparam value: {value} type: {bindvalue.type} self: {self}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"SPoint bindparam value: {value} type: {bindvalue.type} self: {self}")
         if isinstance(value, SPoint) and value.ra is not None and value.dec is not None:
             return func.spoint(value.ra, value.dec)
         return func.spoint(bindvalue)
@@ -320,7 +348,10 @@ try:
     from psycopg2.extensions import register_adapter, AsIs
     def adapt_spoint_for_postgresql(spoint):
         asis_value = AsIs(spoint.literal_value())
-        logger.debug(f"spoint quoted value: {asis_value.getquoted()}")
+        # This is called for every row inserted, so avoid quoting the value a second time
+        # just for a debug message that won't be logged
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"spoint quoted value: {asis_value.getquoted()}")
         return asis_value
 
     register_adapter(SPoint, adapt_spoint_for_postgresql)
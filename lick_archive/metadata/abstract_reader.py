@@ -13,6 +13,25 @@ The steps to add a new instrument are:
 
 class AbstractReader:
 
+    @classmethod
+    def can_read_path(cls, file_path):
+        """
+        Determine if a file could be supported by this MetadataReader using only its path.
+        This allows files to be rejected without opening them. Readers that need
+        the file's header to decide should return True, and make the final decision 
+        in :meth:`can_read`. The result must only depend on the directory the file is in,
+        as it is cached for each directory.
+
+        Args:
+
+        file_path (pathlib.Path): 
+            Path to the file to check. This should be in the Lick Archive directory
+            format (YYYY-MM/DD/<instrument>/<file>).
+
+        Returns (bool): False if the file is not supported, True if it may be.
+        """
+        return True
+
     @classmethod
     def can_read(cls, file_path, hdul):
         """
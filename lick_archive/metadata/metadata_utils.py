@@ -4,14 +4,21 @@ Common utility functions for reading metadata from fits files
 
 import logging
 logger = logging.getLogger(__name__)
+import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from datetime import date
+from datetime import date, datetime, time, timedelta, timezone
+
+from dateutil.parser import parse
 from lick_archive.db.pgsphere import SPoint
 from astropy.io import fits
 
 
 def safe_header(header, key):
     """Read a keyword from a header, returning None if it's not there."""
+    # Astropy only parses a card's value when it is accessed, so looking up the handful
+    # of keywords a reader needs is much faster than converting the whole header to a dict.
     if key in header:
         return header[key]
     else:
@@ -27,25 +34,106 @@ def parse_file_name(filename : Path | str):
     Parse lick archive filenames to get the date and instrument from the path the file was stored under.
     The format of the filename is expected to be 'YYYY-MM/DD/instrument/file
     """
-    if isinstance(filename, str):
-        filename = Path(filename)
-    day = filename.parent.parent.name
-    year_month = filename.parent.parent.parent.name
-    instr = filename.parent.name
-    return f'{year_month}-{day}', instr
+    # A single string split avoids creating a new Path for each parent directory
+    parts = os.fspath(filename).rsplit("/", 4)
+    if len(parts) < 4:
+        # Missing parent directories are treated as empty, the same as Path.parent.name
+        parts = [""] * (4 - len(parts)) + parts
+    return f'{parts[-4]}-{parts[-3]}', parts[-2]
+
+_DIR_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+@lru_cache(maxsize=4096)
+def parse_dir_date(dir_date : str) -> date | None:
+    """
+    Convert the 'YYYY-MM-DD' date returned by :func:`parse_file_name` into a date object.
+    The results are cached, as every file in a directory has the same date.
+
+    Args:
+        dir_date: The date string from the directory name.
+
+    Return: The date, or None if dir_date is not a valid date.
+    """
+    match = _DIR_DATE_RE.fullmatch(dir_date)
+    if match is None:
+        return None
+    try:
+        return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return None
+
+LICK_TIMEZONE = timezone(timedelta(hours=-8))
+"""The fixed UTC-8 offset used for Lick local time when only a directory date is known."""
+
+def parse_utc_datetime(value : str) -> datetime:
+    """
+    Parse an ISO 8601 date/time string from a FITS header, treating it as UTC if it has
+    no time zone. datetime.fromisoformat handles the normal FITS formats quickly, dateutil
+    is only used for anything it can't handle.
+
+    Args:
+        value: The date/time string.
+
+    Return: A timezone aware datetime.
+
+    Raises: ValueError if value could not be parsed.
+    """
+    try:
+        result = datetime.fromisoformat(value)
+    except ValueError:
+        result = parse(value)
+    if result.tzinfo is None:
+        result = result.replace(tzinfo=timezone.utc)
+    return result
+
+def dir_date_noon(dir_date : str) -> datetime:
+    """
+    Return noon Lick time (UTC-8) on the date of a 'YYYY-MM-DD' directory date returned by
+    :func:`parse_file_name`.
+
+    Raises: ValueError if dir_date is not a valid date.
+    """
+    day = parse_dir_date(dir_date)
+    if day is None:
+        raise ValueError(f"Invalid directory date: {dir_date}")
+    return datetime.combine(day, time(hour=12), tzinfo=LICK_TIMEZONE)
+
+# The LAMPSTAX keywords for the 16 shane lamps
+_SHANE_LAMP_KEYS = tuple(f'LAMPSTA{name}' for name in ['1', '2', '3', '4', '5',
+                                                        'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K'])
+
+SHANE_DOME_LAMPS = 0x001F
+"""Bitmask of the shane dome (flat) lamps, LAMPSTA1 - LAMPSTA5, in a lamp status returned by :func:`get_shane_lamp_status`."""
+
+SHANE_ARC_LAMPS = 0xFFE0
+"""Bitmask of the shane arc lamps, LAMPSTAA - LAMPSTAK, in a lamp status returned by :func:`get_shane_lamp_status`."""
 
 def get_shane_lamp_status(header):
-    """Translate the LAMPSTAX header keywords in shane files to an array
-       of booleans."""
-    lamp_names = [ '1', '2', '3', '4', '5',
-                   'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K']
+    """Translate the LAMPSTAX header keywords in shane files to a bitmask. Bit 0
+       is LAMPSTA1, through to bit 15 for LAMPSTAK. 
+       
+       Returns (int or None): The lamp status bitmask, or None if any of the lamp keywords are missing.
+       """
+    # Files without lamp information usually have none of the keywords, so check for the first
+    # one rather than raising and catching a KeyError. Checking every keyword would slow down
+    # the files that do have them.
+    if _SHANE_LAMP_KEYS[0] not in header:
+        return None
 
+    lamp_status = 0
     try:
-        lamp_status = [ (isinstance(header[f'LAMPSTA{name}'], bool) and header[f'LAMPSTA{name}']) or (isinstance(header[f'LAMPSTA{name}'], str) and header[f'LAMPSTA{name}'].lower()=='on') for name in lamp_names]
+        for bit, key in enumerate(_SHANE_LAMP_KEYS):
+            value = header[key]
+            if value is True or (isinstance(value, str) and value.lower()=='on'):
+                lamp_status |= 1 << bit
     except KeyError:
         lamp_status = None
     return lamp_status
 
+# The WCS keywords needed to read coordinates from the "S" alternate WCS or the primary WCS
+_SECONDARY_WCS_KEYS = frozenset(['CRVAL1S', 'CRVAL2S', 'CTYPE1S', 'CTYPE2S', 'WCSNAMES'])
+_PRIMARY_WCS_KEYS = frozenset(['CRVAL1', 'CRVAL2', 'CTYPE1', 'CTYPE2', 'WCSNAME'])
+
 def get_ra_dec(header):
     """Read RA and DEC coordinates from a fits header, prioritizing the
        WCS keywords first, and falling back to 'RA' and 'DEC' if those
@@ -62,32 +150,25 @@ def get_ra_dec(header):
     dec = None
     coord = None
 
-    if ('CRVAL1S' in header and 'CRVAL2S' in header and 
-        'CTYPE1S' in header and 'CTYPE2S' in header and 
-        'WCSNAMES' in header):
-        # Make sure the WCS is really celestial
-        # Note the FITS standard says the first four characters
-        # are for type and are padded with hyphens
-        if (header['WCSNAMES'] == "Celestial coordinates" and
-            header['CTYPE1S'].startswith("RA--") and
-            header['CTYPE2S'].startswith("DEC-")):
-
-            ra  = header['CRVAL1S']
-            dec = header['CRVAL2S']
-
-    if (ra is None and 
-        'CRVAL1' in header and 'CRVAL2' in header and 
-        'CTYPE1' in header and 'CTYPE2' in header and 
-        'WCSNAME' in header):
-        # Make sure the WCS is really celestial
-        # Note the FITS standard says the first four characters
-        # are for type and are padded with hyphens
-        if (header['WCSNAME'] == "Celestial coordinates" and
-            header['CTYPE1'].startswith("RA--") and
-            header['CTYPE2'].startswith("DEC-")):
-
-            ra  = header['CRVAL1']
-            dec = header['CRVAL2']
+    # Make sure the WCS is really celestial
+    # Note the FITS standard says the first four characters
+    # are for type and are padded with hyphens
+    if (all(key in header for key in _SECONDARY_WCS_KEYS) and
+        header['WCSNAMES'] == "Celestial coordinates" and
+        header['CTYPE1S'].startswith("RA--") and
+        header['CTYPE2S'].startswith("DEC-")):
+
+        ra  = header['CRVAL1S']
+        dec = header['CRVAL2S']
+
+    if (ra is None and
+        all(key in header for key in _PRIMARY_WCS_KEYS) and
+        header['WCSNAME'] == "Celestial coordinates" and
+        header['CTYPE1'].startswith("RA--") and
+        header['CTYPE2'].startswith("DEC-")):
+
+        ra  = header['CRVAL1']
+        dec = header['CRVAL2']
 
     if ra is None and 'RA' in header and 'DEC' in header:
         ra = header['RA']
@@ -147,6 +228,17 @@ def validate_header(header_text):
     """
 
     # Currently only a NULL (\x00) value is invalid.
-    if header_text.find('\x00') != -1:
+    if '\x00' in header_text:
         return False, header_text.replace('\x00', ' ')
     return True, None
+
+def header_to_text(header):
+    """
+    Convert a header to the newline separated text stored in the database.
+
+    Returns: The header text, with any invalid characters replaced, and True if the
+    header was valid or False if invalid characters had to be replaced.
+    """
+    header_text = header.tostring(sep='\n', endcard=False, padding=False)
+    valid, fixed_header = validate_header(header_text)
+    return (header_text if valid else fixed_header), valid
@@ -4,14 +4,14 @@ MetadataReader implementation for Shane Kast data.
 
 from datetime import datetime
 import logging
+import os
 from pathlib import Path
 
 from astropy.io.fits import HDUList
 
-from dateutil.parser import parse
 
 from lick_archive.metadata.abstract_reader import AbstractReader
-from lick_archive.metadata.metadata_utils import safe_header, safe_strip, parse_file_name, get_ra_dec, validate_header
+from lick_archive.metadata.metadata_utils import safe_header, safe_strip, parse_file_name, get_ra_dec, parse_utc_datetime, dir_date_noon, header_to_text
 from lick_archive.db.archive_schema import  FileMetadata
 from lick_archive.metadata.data_dictionary import FrameType, IngestFlags, Instrument, Telescope
 
@@ -21,6 +21,22 @@ class NickelReader(AbstractReader):
     """
     Reader implementation for Nickel images.
     """
+    @classmethod
+    def can_read_path(cls, file_path : Path) -> bool:
+        """
+        Determine if a file is Nickel, using only its path.
+
+        Args:
+
+        file_path (pathlib.Path): 
+            Path to the file to check. This should be in the Lick Archive directory
+            format (YYYY-MM/DD/<instrument>/<file>).
+
+        Returns (bool): True if the file is supported, False if it is not.
+        """
+        # Look for the nickel directory name
+        return "nickel" == file_path.parent.name
+
     @classmethod
     def can_read(cls, file_path : Path, hdul : HDUList) -> bool:
         """
@@ -38,11 +54,7 @@ class NickelReader(AbstractReader):
         Returns (bool): True if the file is supported, False if it is not.
         """
 
-        # Look for the nickel directory name
-        if "nickel" == file_path.parent.name:
-            return True
-
-        return False
+        return cls.can_read_path(file_path)
     
 
 
@@ -161,8 +173,8 @@ class NickelReader(AbstractReader):
 
         if obs_date is not None:
             try:
-                # Parse the observation date as an iso date, adding +00:00 to make it UTC
-                m.obs_date = parse(obs_date + "+00:00")
+                # Parse the observation date as an iso date in UTC
+                m.obs_date = parse_utc_datetime(obs_date)
             except Exception as e:
                 logger.warning(f"Failed to parse observation date {obs_date + '00:00'}")
 
@@ -170,7 +182,7 @@ class NickelReader(AbstractReader):
             logger.debug(f"Used file path for date for file {file_path}.")
             filename_date, instr = parse_file_name(file_path)
             # Use noon Lick time (aka UTC-8)
-            m.obs_date = parse(f"{filename_date}T12:00:00-08:00")
+            m.obs_date = dir_date_noon(filename_date)
             ingest_flags = ingest_flags | IngestFlags.USE_DIR_DATE               
 
         m.exptime           = safe_header(header, 'EXPTIME')
@@ -208,20 +220,18 @@ class NickelReader(AbstractReader):
         m.observer = observer
 
 
-        m.filename = str(file_path)
+        m.filename = os.fspath(file_path)
 
         (m.frame_type, frame_flags) = self.determine_frame_type(m.exptime, safe_strip(safe_header(header, 'OBSTYPE')), m.object)
         ingest_flags |= frame_flags
 
         # Save the header for future updates, and 
         # check for an invalid \x00 in the header string, which the DB rejects
-        m.header = header.tostring(sep='\n', endcard=False, padding=False)
-        valid, fixed_header = validate_header(m.header)
+        m.header, valid = header_to_text(header)
         if not valid:
-            m.header = fixed_header
             ingest_flags |= IngestFlags.INVALID_CHAR
 
-        m.ingest_flags = f'{ingest_flags:032b}'            
+        m.ingest_flags = int(ingest_flags)            
         return m
 
         
@@ -5,6 +5,7 @@ import logging
 from pathlib import Path
 import sys
 from datetime import datetime, timezone
+from functools import lru_cache
 
 from lick_archive.metadata.abstract_reader import AbstractReader
 from astropy.io import fits
@@ -19,6 +20,7 @@ from lick_archive.metadata import metadata_utils
 
 from lick_archive.metadata.data_dictionary import IngestFlags
 from lick_archive.db.archive_schema import FileMetadata
+from lick_archive.db.db_utils import file_metadata_to_dict
 from lick_archive.config.archive_config import ArchiveConfigFile
 from lick_archive.authorization import user_access
 lick_archive_config = ArchiveConfigFile.load_from_standard_inifile().config
@@ -26,7 +28,40 @@ lick_archive_config = ArchiveConfigFile.load_from_standard_inifile().config
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _readers_for_directory(directory):
+    """
+    Find the readers that could support files in a directory, using :meth:`AbstractReader.can_read_path`.
+    The results are cached, as the archive stores files from one instrument and night in each directory.
+
+    Args:
+    directory (pathlib.Path):
+        The directory containing the files.
 
+    Return (tuple of type): The AbstractReader subclasses that may be able to read files in the directory.
+    """
+    # can_read_path only uses the directory names, so any file name can be used to check it
+    file_path = directory / "file.fits"
+    return tuple(child for child in AbstractReader.__subclasses__() if child.can_read_path(file_path))
+
+# Files starting with these are compressed, and may be FITS files that astropy can decompress
+_COMPRESSED_MAGIC = (b'\x1f\x8b', b'BZh', b'PK\x03\x04')
+
+def _could_be_fits(file_path):
+    """
+    Check the first header card of a file to see if it could be a FITS file, so that binary files
+    can be rejected without astropy trying to parse them. Files without a SIMPLE card are
+    accepted if the card is ASCII text, as open_fits_file can still open them.
+
+    Args:
+    file_path (pathlib.Path):
+        Path to the file to check.
+
+    Return (bool): False if the file is definitely not a FITS file, True if it may be.
+    """
+    with open(file_path, "rb") as f:
+        first_card = f.read(80)
+    return first_card.startswith(b'SIMPLE') or first_card.startswith(_COMPRESSED_MAGIC) or first_card.isascii()
 
 def open_fits_file(file_path):
     """
@@ -49,14 +84,25 @@ def open_fits_file(file_path):
 
     ingest_flags = IngestFlags.CLEAR
     hdul = None
+    if not _could_be_fits(file_path):
+        logger.error(f"{file_path} is not a FITS file.")
+        return hdul, IngestFlags.UNKNOWN_FORMAT
+
     ignore_missing_end = False
     ignore_missing_simple = False
     fix_verify = False
     while(True):
         try:
+            # Verifying the header cards is most of the cost of opening a file, but it is
+            # needed to flag and fix invalid headers. The readers also rely on astropy's Header
+            # behavior (such as its handling of invalid cards), so a faster header only reader like
+            # fitsio is not used.
+            # Only headers are read, so don't memory map or scale the image data
             hdul = fits.open(file_path, 
                              ignore_missing_end = ignore_missing_end, 
-                             ignore_missing_simple=ignore_missing_simple)
+                             ignore_missing_simple=ignore_missing_simple,
+                             memmap=False,
+                             do_not_scale_image_data=True)
             if fix_verify:
                 hdul.verify('silentfix')
             else:
@@ -127,6 +173,10 @@ def read_file(file_path):
     if isinstance(file_path, str):
         file_path = Path(file_path)
 
+    # Don't open files that no reader could support
+    if len(_readers_for_directory(file_path.parent)) == 0:
+        raise ValueError(f"Unsupported file path: {file_path}")
+
     hdul = None
     try:
         hdul, ingest_flags = open_fits_file(file_path)
@@ -146,6 +196,45 @@ def read_file(file_path):
         if hdul is not None:
             hdul.close()
 
+def _read_file_in_worker(file_path):
+    """
+    Read the metadata from a file in a worker process. Exceptions are returned
+    rather than raised, so that one bad file doesn't stop the other results.
+
+    Returns:
+    A tuple of the file, the metadata read from it as a dict (or None), and the exception message (or None)
+    """
+    try:
+        logger.debug("Reading metadata from %s.", file_path)
+        # Convert to a dict in the worker, so only column values are sent back to the main process
+        return (file_path, file_metadata_to_dict(read_file(file_path)), None)
+    except Exception as e:
+        logger.error(f"Failed to read {file_path}.", exc_info = True)
+        return (file_path, None, f"{e.__class__.__name__}: {e}")
+
+def read_files(file_paths, executor, chunksize=64):
+    """
+    Read metadata from multiple files in parallel.
+
+    Args:
+        file_paths (Iterable of pathlib.Path or str):
+            The paths of the files to read. All of the paths are submitted to the executor at once,
+            so callers reading a large number of files should pass them in batches.
+
+        executor (concurrent.futures.Executor):
+            The executor to read the files with, usually a ProcessPoolExecutor. Reading
+            headers is CPU bound, so a thread pool will not help much.
+
+        chunksize (int):
+            The number of files sent to a worker process at a time.
+
+    Returns (Iterator of tuple):
+        A tuple for each file, in the same order as file_paths. Each tuple has the file path, the
+        metadata as returned by :func:`lick_archive.db.db_utils.file_metadata_to_dict` (or None if
+        the file couldn't be read), and an error message (or None if the file was read).
+    """
+    return executor.map(_read_file_in_worker, file_paths, chunksize=chunksize)
+
 def read_hdul(file_path, hdul, ingest_flags):
     """
     Read a row of metadata from a FITS HDUList.
@@ -172,15 +261,16 @@ def read_hdul(file_path, hdul, ingest_flags):
     if isinstance(file_path, str):
         file_path = Path(file_path)
 
-    # Ask each AbstractReader subclass if it can handle the file, and use it 
-    # if it can
-    for child in AbstractReader.__subclasses__():
+    # Ask each AbstractReader subclass that could support files in the directory
+    # if it can handle the file, and use it if it can
+    for child in _readers_for_directory(file_path.parent):
         if child.can_read(file_path, hdul):
             row = child().read_row(file_path, hdul, ingest_flags)            
 
             # Try to set the file size and mtime, but leave them as None if needed
             try:
-                st_info = file_path.stat() if not file_path.is_symlink() else file_path.lstat()
+                # lstat gives the same result as stat for regular files, and the link itself for symlinks
+                st_info = file_path.lstat()
                 row.file_size = st_info.st_size
                 row.mtime = datetime.fromtimestamp(st_info.st_mtime,tz=timezone.utc)
             except Exception as e:
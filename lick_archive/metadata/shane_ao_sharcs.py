@@ -3,19 +3,60 @@ MetadataReader implementation for Shane AO/ShARCS data.
 """
 from datetime import datetime, date
 import logging
+import os
 
-from dateutil.parser import parse
 from sqlalchemy.dialects.postgresql import BIT
 from sqlalchemy import cast
 
 from lick_archive.metadata.abstract_reader import AbstractReader
-from lick_archive.metadata.metadata_utils import safe_header, parse_file_name, get_shane_lamp_status, get_ra_dec, validate_header
+from lick_archive.metadata.metadata_utils import safe_header, parse_file_name, parse_dir_date, parse_utc_datetime, dir_date_noon, get_shane_lamp_status, get_ra_dec, SHANE_DOME_LAMPS, header_to_text
 from lick_archive.db.archive_schema import  FileMetadata
 from lick_archive.metadata.data_dictionary import FrameType, IngestFlags, Telescope, Instrument
 
 logger = logging.getLogger(__name__)
 
 class ShaneAO_ShARCS(AbstractReader):
+
+    # Based inspecting data in the archive, there's no ShARCS data before april 2014
+    # This differentiates it from older IRCAL data
+    _first_sharcs_date = date(year=2014, month=4, day=1)
+
+    # Metadata attributes that are copied directly from a header keyword
+    _header_keywords = (('coadds_done',   'COADDONE'),
+                        ('true_int_time', 'TRUITIME'),
+                        ('object',        'OBJECT'),
+                        ('airmass',       'AIRMASS'),
+                        ('apername',      'APERNAM'),
+                        ('filter1',       'FILT1NAM'),
+                        ('filter2',       'FILT2NAM'),
+                        ('sci_filter',    'SCIFILT'),
+                        ('program',       'PROGRAM'),
+                        ('observer',      'OBSERVER'))
+
+    # Metadata attributes that don't apply to ShARCS
+    _unused_attributes = ('slit_name', 'beam_splitter_pos', 'grism', 'grating_name', 'grating_tilt')
+
+    @classmethod
+    def can_read_path(cls, file_path):
+        """
+        Determine if a file is ShaneAO/ShARCS data. Only the path is needed for this.
+
+        Args:
+
+        file_path (pathlib.Path): 
+            Path to the file to check. This should be in the Lick Archive directory
+            format (YYYY-MM/DD/<instrument>/<file>).
+
+        Returns (bool): True if the file is ShaneAO/Sharcs data, False if it is not.
+        """
+        # Check the instrument directory first, as it rejects most files without parsing the date
+        if file_path.parent.name != "AO":
+            return False
+
+        filename_date, instr = parse_file_name(file_path)
+        file_date = parse_dir_date(filename_date)
+        return file_date is not None and file_date >= cls._first_sharcs_date
+
     @classmethod
     def can_read(cls, file_path, hdul):
         """
@@ -32,16 +73,7 @@ class ShaneAO_ShARCS(AbstractReader):
 
         Returns (bool): True if the file is ShaneAO/Sharcs data, False if it is not.
         """
-        filename_date, instr = parse_file_name(file_path)
-        if instr == "AO":
-            file_date_parts = filename_date.split("-")
-            file_date = date(year=int(file_date_parts[0]), month=int(file_date_parts[1]), day=int(file_date_parts[2]))
-            # Based inspecting data in the archive, there's no ShARCS data before april 2014
-            # This differentiates it from older IRCAL data
-            if file_date >= date(year=2014, month=4, day=1):
-                return True
-
-        return False
+        return cls.can_read_path(file_path)
     
     def determine_frame_type(self, object, filter2, caly_name, lamps):
         """
@@ -51,7 +83,7 @@ class ShaneAO_ShARCS(AbstractReader):
         object (str):    The object field from the header.
         filter2 (str):   The filter2 field from the header.
         caly_name (str): The CALY_NAME field from the header.
-        lamps (list of bool):  The lamp status as returned by metadata_utils.get_shane_lamp_status.
+        lamps (int):           The lamp status bitmask as returned by metadata_utils.get_shane_lamp_status.
 
         Returns tuple (FrameType, IngestFlags): The frame type of the file, and any ingest flags
                                                 set from determining the frame type.
@@ -63,7 +95,7 @@ class ShaneAO_ShARCS(AbstractReader):
             frame_type = FrameType.dark
         elif caly_name is not None and caly_name in ('Red Light', 'Argon'):
             frame_type = FrameType.arc
-        elif lamps is not None and any(lamps[0:5]):
+        elif lamps is not None and lamps & SHANE_DOME_LAMPS:
             # If any dome lights are on this is considered a flat
             # Per an e-mail from Ellie Gates, only the flat lamps matter for ShARCS,
             # with lamps 5 and 2 being the most often used and others used rarely.
@@ -79,12 +111,13 @@ class ShaneAO_ShARCS(AbstractReader):
         if frame_type == FrameType.unknown:
 
             if object is not None:
-                if "dark" in object.lower() and filter2 is None:
+                object_lower = object.lower()
+                if "dark" in object_lower and filter2 is None:
                     # Don't set it to dark if filter2 is actually in the header
                     frame_type = FrameType.dark
-                elif "flat" in object.lower():
+                elif "flat" in object_lower:
                     frame_type = FrameType.flat
-                elif "arc" in object.lower():
+                elif "arc" in object_lower:
                     frame_type = FrameType.arc
                 elif len(object.strip()) > 0:
                     frame_type = FrameType.science
@@ -121,14 +154,14 @@ class ShaneAO_ShARCS(AbstractReader):
         m.telescope = Telescope.SHANE
         m.instrument = Instrument.SHARCS
 
-        # Parse the observation date as an iso date, adding +00:00 to make it UTC
+        # Parse the observation date as an iso date, treating it as UTC
         
         m.obs_date = None
         date_beg = safe_header(header, 'DATE-BEG')
         if date_beg is not None:
             logger.debug("Found DATE-BEG")
             try:
-                m.obs_date = parse(date_beg + "+00:00")
+                m.obs_date = parse_utc_datetime(date_beg)
             except ValueError as e:
                 logger.error(f"Invalid format for DATE-BEG: {date_beg}")
 
@@ -141,7 +174,7 @@ class ShaneAO_ShARCS(AbstractReader):
                 time_obs = safe_header(header, 'TIME-OBS')
                 if time_obs is not None:
                     try:
-                        m.obs_date = parse(f"{date_obs}T{time_obs}+00:00")
+                        m.obs_date = parse_utc_datetime(f"{date_obs}T{time_obs}")
                         ingest_flags = ingest_flags | IngestFlags.AO_USE_DATE_OBS
                     except ValueError:
                         logger.error(f"Invalid format for DATE-OBS/TIME-OBS: {date_obs}/{time_obs}")
@@ -154,10 +187,13 @@ class ShaneAO_ShARCS(AbstractReader):
             logger.debug("Using directory date for observation date.")
             ingest_flags = ingest_flags | IngestFlags.USE_DIR_DATE
             # Use noon Lick time (aka UTC-8)
-            m.obs_date = parse(f"{filename_date}T12:00:00-08:00")
+            m.obs_date = dir_date_noon(filename_date)
+
+        for attribute, keyword in self._header_keywords:
+            setattr(m, attribute, safe_header(header, keyword))
+        for attribute in self._unused_attributes:
+            setattr(m, attribute, None)
 
-        m.coadds_done = safe_header(header, 'COADDONE')
-        m.true_int_time = safe_header(header, 'TRUITIME')
         if m.true_int_time is not None and m.coadds_done is not None:
             m.exptime = m.true_int_time * m.coadds_done
         else:
@@ -167,29 +203,14 @@ class ShaneAO_ShARCS(AbstractReader):
         if m.coord is None:
             ingest_flags = ingest_flags | IngestFlags.NO_COORD
 
-        m.object            = safe_header(header, 'OBJECT')
-        m.slit_name         = None
-        m.airmass           = safe_header(header,'AIRMASS')
-        m.beam_splitter_pos = None
-        m.grism             = None
-        m.grating_name      = None
-        m.grating_tilt      = None
-        m.filename = str(file_path)
-        m.apername = safe_header(header,'APERNAM')
-        m.filter1 = safe_header(header,'FILT1NAM')
-        m.filter2 = safe_header(header,'FILT2NAM')
-        m.sci_filter = safe_header(header,'SCIFILT')
-        m.program = safe_header(header,'PROGRAM')
-        m.observer = safe_header(header,'OBSERVER')
+        m.filename = os.fspath(file_path)
         lamp_status = get_shane_lamp_status(header)
         (m.frame_type, frame_flags) = self.determine_frame_type(m.object, m.filter2, safe_header(header, 'CALYNAM'), lamp_status)
         ingest_flags |= frame_flags
-        m.ingest_flags = f'{ingest_flags:032b}'
-        m.header = header.tostring(sep='\n', endcard=False, padding=False)
-        valid, fixed_header = validate_header(m.header)
+        m.header, valid = header_to_text(header)
         if not valid:
-            m.header = fixed_header
             ingest_flags |= IngestFlags.INVALID_CHAR
+        m.ingest_flags = int(ingest_flags)
 
         return m
 
@@ -4,11 +4,11 @@ MetadataReader implementation for Shane Kast data.
 
 from datetime import datetime
 import logging
+import os
 
-from dateutil.parser import parse
 
 from lick_archive.metadata.abstract_reader import AbstractReader
-from lick_archive.metadata.metadata_utils import safe_header, safe_strip, parse_file_name, get_shane_lamp_status, get_ra_dec, validate_header
+from lick_archive.metadata.metadata_utils import safe_header, safe_strip, parse_file_name, get_shane_lamp_status, get_ra_dec, parse_utc_datetime, dir_date_noon, SHANE_DOME_LAMPS, SHANE_ARC_LAMPS, header_to_text
 from lick_archive.db.archive_schema import  FileMetadata
 from lick_archive.metadata.data_dictionary import FrameType, IngestFlags, Instrument, Telescope
 
@@ -18,6 +18,45 @@ class ShaneKastReader(AbstractReader):
     """
     Reader implementation for Shane Kast data.
     """
+    # Metadata attributes that are copied from a header keyword with whitespace stripped
+    _stripped_header_keywords = (('object',            'OBJECT'),
+                                 ('slit_name',         'SLIT_N'),
+                                 ('beam_splitter_pos', 'BSPLIT_N'),
+                                 ('grism',             'GRISM_N'),
+                                 ('grating_name',      'GRATNG_N'),
+                                 ('program',           'PROGRAM'),
+                                 ('observer',          'OBSERVER'))
+
+    # Metadata attributes that are copied directly from a header keyword
+    _header_keywords = (('airmass',      'AIRMASS'),
+                        ('grating_tilt', 'GRTILT_P'))
+
+    # Metadata attributes that don't apply to Kast
+    _unused_attributes = ('apername', 'filter1', 'filter2', 'sci_filter')
+
+    # Frame types for object names containing a keyword, used when there is no lamp information.
+    # The first matching keyword is used.
+    _object_frame_types = (('flat', FrameType.flat),
+                           ('dark', FrameType.dark),
+                           ('arc',  FrameType.arc),
+                           ('bias', FrameType.bias))
+
+    @classmethod
+    def can_read_path(cls, file_path):
+        """
+        Determine if a file could be Shane Kast data, using only its path. The header
+        is needed to be sure.
+
+        Args:
+
+        file_path (pathlib.Path): 
+            Path to the file to check. This should be in the Lick Archive directory
+            format (YYYY-MM/DD/<instrument>/<file>).
+
+        Returns (bool): False if the file is not supported, True if it may be.
+        """
+        return file_path.parent.name == "shane"
+
     @classmethod
     def can_read(cls, file_path, hdul):
         """
@@ -35,7 +74,7 @@ class ShaneKastReader(AbstractReader):
         Returns (bool): True if the file is supported, False if it is not.
         """
 
-        if "shane" in str(file_path.parent):
+        if cls.can_read_path(file_path):
             if safe_header(hdul[0].header,'VERSION' ) in ['kastr', 'kastb']:
                 return True
             elif 'INSTRUME' in hdul[0].header:
@@ -59,7 +98,7 @@ class ShaneKastReader(AbstractReader):
 
         Args:
         exptime (float):      Exposure time in seconds.
-        lamps (list of bool): The lamp status, as returned by metadata_utils.get_shane_lamp_status.
+        lamps (int):          The lamp status bitmask, as returned by metadata_utils.get_shane_lamp_status.
         object (str):         The OBJECT keyword from the file's header.
 
         Returns (FrameType, IngestFlags): A tuple with the frame type, and any ingest flags set
@@ -70,19 +109,14 @@ class ShaneKastReader(AbstractReader):
             logger.debug("No lamps information, using OBJECT to determine frame type.")
             ingest_flags = ingest_flags | IngestFlags.NO_LAMPS_IN_HEADER
             if object is not None:
-                if 'flat' in object.lower():
-                    frame_type = FrameType.flat
-                elif 'dark' in object.lower():
-                    frame_type = FrameType.dark
-                elif 'arc' in object.lower():
-                    frame_type = FrameType.arc
-                elif 'bias' in object.lower():
-                    frame_type = FrameType.bias
-                elif len(object.strip()) > 0:
-                    frame_type = FrameType.science
-                else:
-                    ingest_flags = ingest_flags | IngestFlags.NO_OBJECT_IN_HEADER
-                    frame_type = FrameType.unknown
+                object_lower = object.lower()
+                frame_type = next((ft for keyword, ft in self._object_frame_types if keyword in object_lower), None)
+                if frame_type is None:
+                    if len(object.strip()) > 0:
+                        frame_type = FrameType.science
+                    else:
+                        ingest_flags = ingest_flags | IngestFlags.NO_OBJECT_IN_HEADER
+                        frame_type = FrameType.unknown
             else:
                 ingest_flags = ingest_flags | IngestFlags.NO_OBJECT_IN_HEADER
                 frame_type = FrameType.unknown
@@ -91,7 +125,7 @@ class ShaneKastReader(AbstractReader):
             # If there are no lamps, it's science if it's > 1s exposure or
             # bias if it's less
             frame_type = FrameType.unknown
-            if not any(lamps):
+            if lamps == 0:
                 if exptime > 1:
                     frame_type = FrameType.science
 
@@ -99,11 +133,11 @@ class ShaneKastReader(AbstractReader):
             if exptime <= 1:
                 frame_type = FrameType.bias
             else:
-                if any([lamps[i] for i in range(0, 5)]):
+                if lamps & SHANE_DOME_LAMPS:
                     # If any dome lights are on this is considered a flat
                     frame_type = FrameType.flat
                 
-                elif any([lamps[i] for i in range(5, 16)]):
+                elif lamps & SHANE_ARC_LAMPS:
                     # Check for arcs
                     if exptime <= 61:
                         frame_type = FrameType.arc
@@ -170,11 +204,11 @@ class ShaneKastReader(AbstractReader):
             logger.debug(f"Used file path for date for file {file_path}.")
             filename_date, instr = parse_file_name(file_path)
             # Use noon Lick time (aka UTC-8)
-            m.obs_date = parse(f"{filename_date}T12:00:00-08:00")
+            m.obs_date = dir_date_noon(filename_date)
             ingest_flags = ingest_flags | IngestFlags.USE_DIR_DATE
         else:
-            # Parse the observation date as an iso date, adding +00:00 to make it UTC
-            m.obs_date = parse(date_obs + "+00:00")
+            # Parse the observation date as an iso date in UTC
+            m.obs_date = parse_utc_datetime(date_obs)
 
         m.exptime           = safe_header(header, 'EXPTIME')
         if m.exptime is None:
@@ -185,23 +219,14 @@ class ShaneKastReader(AbstractReader):
         if m.coord is None:
             ingest_flags = ingest_flags | IngestFlags.NO_COORD
 
-        m.object            = safe_strip(safe_header(header, 'OBJECT'))
-        m.slit_name         = safe_strip(safe_header(header, 'SLIT_N'))
-        m.airmass           = safe_header(header, 'AIRMASS')
-        m.beam_splitter_pos = safe_strip(safe_header(header, 'BSPLIT_N'))
-        m.grism             = safe_strip(safe_header(header, 'GRISM_N'))
-        m.grating_name      = safe_strip(safe_header(header, 'GRATNG_N'))
-        m.grating_tilt      = safe_header(header, 'GRTILT_P')
-
-        m.apername = None
-        m.filter1 = None
-        m.filter2 = None
-        m.sci_filter = None
-        m.program = safe_strip(safe_header(header,'PROGRAM'))
-        m.observer = safe_strip(safe_header(header,'OBSERVER'))
-
+        for attribute, keyword in self._stripped_header_keywords:
+            setattr(m, attribute, safe_strip(safe_header(header, keyword)))
+        for attribute, keyword in self._header_keywords:
+            setattr(m, attribute, safe_header(header, keyword))
+        for attribute in self._unused_attributes:
+            setattr(m, attribute, None)
 
-        m.filename = str(file_path)
+        m.filename = os.fspath(file_path)
 
         lamp_status = get_shane_lamp_status(header)
         (m.frame_type, frame_flags) = self.determine_frame_type(m.exptime, lamp_status, m.object)
@@ -210,13 +235,11 @@ class ShaneKastReader(AbstractReader):
 
         # Save the header for future updates, and 
         # check for an invalid \x00 in the header string, which the DB rejects
-        m.header = header.tostring(sep='\n', endcard=False, padding=False)
-        valid, fixed_header = validate_header(m.header)
+        m.header, valid = header_to_text(header)
         if not valid:
-            m.header = fixed_header
             ingest_flags |= IngestFlags.INVALID_CHAR
 
-        m.ingest_flags = f'{ingest_flags:032b}'            
+        m.ingest_flags = int(ingest_flags)            
         return m
 
         
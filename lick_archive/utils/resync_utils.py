@@ -2,6 +2,7 @@
 from datetime import date, timedelta
 from pathlib import Path
 import argparse
+import os
 from collections.abc import Iterator
 from contextlib import closing
 import re
@@ -197,68 +198,80 @@ def parse_date_range(date_range):
             start_str = date_range
             end_str = None
 
-        date_list = start_str.split('-')
-        if len(date_list) < 3:
-            raise ValueError(f"'{start_str}' is an invalid start date. It should be YYYY-MM-DD.")
-
         try:
-            start_date = date(int(date_list[0]), int(date_list[1]), int(date_list[2]))
-        except:
-            raise ValueError(f"'{start_str}' is an invalid start date. It should be YYYY-MM-DD.")
+            start_date = date.fromisoformat(start_str)
+        except ValueError as e:
+            raise ValueError(f"'{start_str}' is an invalid start date. It should be YYYY-MM-DD.") from e
 
         if end_str is None:
             end_date = start_date
         else:
-            date_list = end_str.split('-')
-            if len(date_list) < 3:
-                raise ValueError(f"'{end_str}' is an invalid end date. It should be YYYY-MM-DD.")
-
             try:
-                end_date = date(int(date_list[0]), int(date_list[1]), int(date_list[2]))
-            except:
-                raise ValueError(f"'{end_str}' is an invalid start date. It should be YYYY-MM-DD.")
+                end_date = date.fromisoformat(end_str)
+            except ValueError as e:
+                raise ValueError(f"'{end_str}' is an invalid end date. It should be YYYY-MM-DD.") from e
 
         return (start_date, end_date)
     return (None, None)
 
-def get_dirs_for_daterange(date_range, instrument_dirs):
+_MONTH_DIR_RE = re.compile(r'\d{4}-\d{2}')
+_DAY_DIR_RE = re.compile(r'\d{2}')
+
+def get_dirs_for_daterange(date_range, instrument_dirs, archive_root=None):
     """
     Scan the lick archive root dir for files that match command line parameters.
 
     The direcotires in the archive are expected to follow the 'YYYY-MM/DD/instrument/' convention.
+    If a date range is given, the directories for each day in the range are looked up directly.
+    Otherwise the whole archive is scanned using :func:`os.scandir`, so that the file type of each
+    entry comes from the directory listing itself rather than a separate stat() call.
 
     Args:
 
     date_range: (str): The date range as specified on the command line '--date_range' argument.
     instrument_dirs: (list of str) A list of instruments to find files for.
+    archive_root: (str or pathlib.Path) The top level archive directory. Defaults to the archive_root_dir
+                  in the archive configuration.
 
     Returns: A generator for the list of matching pathlib.Path objects.
     """
     start_date, end_date = parse_date_range(date_range)
 
-    instrument_dirs = get_valid_instrument_dirs(instrument_dirs)
+    instrument_dirs = frozenset(get_valid_instrument_dirs(instrument_dirs))
+
+    if archive_root is None:
+        archive_root = lick_archive_config.ingest.archive_root_dir
+
+    if start_date is not None:
+        # Look up the directories for each day in the date range directly, rather than scanning
+        # the whole archive
+        current_date = start_date
+        while current_date <= end_date:
+            day_dir = os.path.join(archive_root, f"{current_date.year:04d}-{current_date.month:02d}", f"{current_date.day:02d}")
+            for instrument_dir in instrument_dirs:
+                path = os.path.join(day_dir, instrument_dir)
+                if os.path.isdir(path):
+                    yield Path(path)
+            current_date += timedelta(days=1)
+        return
 
     # Go through the month directories
-    for month_dir in lick_archive_config.ingest.archive_root_dir.iterdir():
-        if month_dir.is_dir():
+    with os.scandir(archive_root) as month_entries:
+        for month_entry in month_entries:
             # This should be a directory of the format YYYY-MM
-            match = re.match(r'^(\d\d\d\d)-(\d\d)$', month_dir.name)
-            if match is not None:
-                year = int(match.group(1))
-                month = int(match.group(2))
-                # Go through the day directories
-                for day_dir in month_dir.iterdir():
-                    if day_dir.is_dir() and re.match(r'^\d\d$',day_dir.name) is not None:
-                        day = int(day_dir.name)
-                        # Build a date object and if it's between the requested date range (inclusive), keep searching this
-                        # directory
-                        current_date = date(year, month, day)
-                        if start_date is None or (current_date >= start_date and current_date <= end_date):
-                            # Go through instrument directories
-                            for instrument_dir in day_dir.iterdir():                                
-                                # Return any files found for the requested instruments
-                                if instrument_dir.is_dir() and instrument_dir.name in instrument_dirs:
-                                    yield instrument_dir
+            if _MONTH_DIR_RE.fullmatch(month_entry.name) is None or not month_entry.is_dir():
+                continue
+            # Go through the day directories
+            with os.scandir(month_entry.path) as day_entries:
+                for day_entry in day_entries:
+                    if _DAY_DIR_RE.fullmatch(day_entry.name) is None or not day_entry.is_dir():
+                        continue
+                    # Go through instrument directories
+                    with os.scandir(day_entry.path) as instrument_entries:
+                        for instrument_entry in instrument_entries:
+                            # Return any files found for the requested instruments
+                            if instrument_entry.name in instrument_dirs and instrument_entry.is_dir():
+                                yield Path(instrument_entry.path)
 
 def read_id_file(file : Path|str) -> list[int]:
     """Read a file containing database ids. The ids are integers that can be separated by any whitespace
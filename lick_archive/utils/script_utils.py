@@ -3,6 +3,8 @@ import logging
 from logging.handlers import WatchedFileHandler
 from datetime import datetime, timezone
 import time
+import os
+import re
 from pathlib import Path
 
 def get_std_log_formatter(log_tid=False, log_pid=False):
@@ -112,7 +114,9 @@ def setup_service_logging(log_path, log_name, log_level, log_tid=False):
 
 def get_unique_file(path, prefix, extension=""):
     """
-    Return a unique filename.
+    Create and return a unique file. The file is named prefix + extension, or if that already
+    exists prefix.n + extension, where n is one more than the highest numbered file already in path.
+    The file is created with O_EXCL so that two processes can not be given the same file.
 
     Args:
     path (pathlib.Path): Path where the unique file will be located.
@@ -120,19 +124,24 @@ def get_unique_file(path, prefix, extension=""):
     extension (str): File extension for the file. Defaults to empty.
 
     Returns:
-    A filename starting with prefix, ending with extension, that does not currently
-    exist.
+    A newly created, empty, file starting with prefix, ending with extension.
     """
     if extension != "" and not extension.startswith('.'):
         extension = '.' + extension            
 
     unique_file = path.joinpath(prefix + extension)
-    n = 1
-    while unique_file.exists():
-        unique_file = path.joinpath(prefix + f".{n}" + extension)
-        n+=1
-    return unique_file
-
-
-
-            
+    n = None
+    while True:
+        try:
+            fd = os.open(unique_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            return unique_file
+        except FileExistsError:
+            if n is None:
+                # Find the highest numbered file with one directory listing, rather than
+                # checking for each numbered file in turn
+                numbered_pattern = re.compile(re.escape(prefix) + r"\.(\d+)" + re.escape(extension))
+                with os.scandir(path) as entries:
+                    n = max([int(match.group(1)) for entry in entries if (match := numbered_pattern.fullmatch(entry.name)) is not None], default=0)
+            n += 1
+            unique_file = path.joinpath(prefix + f".{n}" + extension)
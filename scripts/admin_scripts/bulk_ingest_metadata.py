@@ -3,15 +3,22 @@ Ingest metadata from existing data in the Lick archive in bulk.
 """
 
 import argparse
+import os
 import sys
 from pathlib import Path
 from datetime import date, datetime, timezone
 import re
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
-from lick_archive.metadata.reader import read_file
-from lick_archive.db.db_utils import create_db_engine, open_db_session, insert_one, insert_batch
-from lick_archive.utils.script_utils import setup_logging, get_unique_file, parse_date_range, get_files_for_daterange
+from sqlalchemy import inspect
+
+from lick_archive.metadata.reader import read_files
+from lick_archive.db.archive_schema import FileMetadata
+from lick_archive.db.db_utils import create_db_engine, open_db_session, insert_batch, copy_batch, find_existing_files
+from lick_archive.utils.script_utils import setup_logging, get_unique_file
+from lick_archive.utils.resync_utils import get_dirs_for_daterange
 
 logger = logging.getLogger(__name__)
                                 
@@ -27,6 +34,11 @@ def get_parser():
     parser.add_argument("--date_range", type=str, help='Date range of files to ingest. Examples: "2010-01-04", "2010-01-01:2011-12-31". Defaults to all.')
     parser.add_argument("--batch_size", type=int, default=10000, help='Number of rows to insert into the database at once, defaults to 10,000')
     parser.add_argument("--instruments", type=str, nargs="+", help='Which instruments to get metadata from. Defaults to all.')
+    parser.add_argument("--num_workers", type=int, default=os.cpu_count(), help='Number of processes used to read metadata from files. Defaults to the number of CPUs.')
+    parser.add_argument("--bulk_mode", default=False, action="store_true", help='Drop the non-unique indexes on the metadata table before ingesting and rebuild them afterwards. '
+                                                                                  'This is faster for large ingests, but queries will be slow while it runs.')
+    parser.add_argument("--skip_existing", default=False, action="store_true", help='Skip files that already have metadata in the database without reading them. This allows an '
+                                                                                      'interrupted ingest to be re-run. Changed files are not updated, use resync_archive_files.py for that.')
     parser.add_argument("-d", "--dbname", type=str, default='archive', help='Name of the database to connect to. Defaults to "archive".')
     parser.add_argument("-U", "--username", type=str, default='archive', help='Name of the database user to connect with. Defaults ot "archive".')
     parser.add_argument("--log_path", "-l", type=str, help="Directory to write log file to." )
@@ -35,18 +47,69 @@ def get_parser():
 
 
 
-def retry_one_by_one(error_file, engine, batch):
+def get_files_for_daterange(archive_root, date_range, instruments):
+    """
+    Return the files within the instrument directories matching a date range.
+    """
+    for instrument_dir in get_dirs_for_daterange(date_range, instruments, archive_root):
+        with os.scandir(instrument_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield Path(entry.path)
+
+
+def get_deferrable_indexes():
+    """
+    Return the indexes on the metadata table that can be dropped during a bulk ingest. 
+    Unique indexes are kept so that duplicate files are still rejected.
+    """
+    return [index for index in FileMetadata.__table__.indexes if not index.unique]
+
+
+def use_existing_index_methods(engine, indexes):
+    """
+    Set the index method of each index to the method of the same index in the database, so that
+    an index created with a non-default method (e.g. create_schema.py --coord_index_method spgist)
+    is rebuilt with that method rather than the schema's default.
+    """
+    existing = {index["name"]: index for index in inspect(engine).get_indexes(FileMetadata.__table__.name)}
+    for index in indexes:
+        if index.name in existing:
+            method = existing[index.name].get("dialect_options", {}).get("postgresql_using")
+            if method is not None:
+                index.dialect_options['postgresql']['using'] = method
+
+
+def retry_one_by_one(error_file, session, batch):
     """
     Retry inserting a batch of metadata one row at a time, in case
     one of the rows failed due to a schema issue rather than an intermittent db issue.
     """
+    # Each row gets a savepoint, so a bad row only rolls back itself
     for row in batch:
         try:
-            insert_one(engine, row)
+            with session.begin_nested():
+                insert_batch(session, [row])
         except Exception as e:
             with open(error_file, "a") as f:
-                print(f"Failed to retry {row.filename}: {e}", file=f)
-            logger.error(f"Failed to retry {row.filename}: {e}")
+                print(f"Failed to retry {row['filename']}: {e}", file=f)
+            logger.error("Failed to retry %s: %s", row['filename'], e)
+    session.commit()
+
+
+def ingest_batch(error_file, session, batch, skip_existing=False):
+    """
+    Insert a batch of metadata in one transaction, falling back to
+    inserting one row at a time if that fails.
+    """
+    try:
+        copy_batch(session, batch, skip_existing=skip_existing)
+        session.commit()
+        logger.info("Committed %d rows", len(batch))
+    except Exception as e:
+        logger.error(f"Failed to insert batch, retrying one by one: {e}")
+        session.rollback()
+        retry_one_by_one(error_file, session, batch)
         
 
 def main(args):
@@ -61,7 +124,6 @@ def main(args):
         engine = create_db_engine()
         error_file = get_unique_file (Path("."), "ingest_failures", "txt")
         supported_instruments = ['shane', 'AO']
-        (start_date, end_date) = parse_date_range(args.date_range)
         if args.instruments is not None:
             for instrument in args.instruments:
                 if instrument not in supported_instruments:
@@ -71,38 +133,50 @@ def main(args):
             args.instruments = supported_instruments
 
         # Get the files to read metadata from
-        files = get_files_for_daterange(args.archive_root, start_date, end_date, args.instruments)
-
-        # Insert metadata for the specified files in batches
-        batch = []
-        for file in files:
-            try:
-                logger.debug(f"Reading metadata from {file}.")
-                next_row = read_file(file)
-            except Exception as e:
-                with open(error_file, "a") as f:
-                    print(f"Failed to read {file}: {e}", file=f)
-                logger.error(f"Failed to read {file}.", exc_info = True)
-                continue
-
-            logger.info(f"Finished reading metadata from {file}")
-            batch.append(next_row)
-
-            # Insert the batch once it's full
-            if len(batch) >= args.batch_size:
-                try:
-                    session=open_db_session(engine)
-                    insert_batch(session, batch)
-                except Exception as e:
-                    retry_one_by_one(error_file, engine, batch)
-                batch = []
-        # Insert any left over data that did not fill an entire batch
-        if len(batch) > 0:
-            try:
-                session=open_db_session(engine)
-                insert_batch(session, batch)
-            except Exception as e:
-                retry_one_by_one(error_file, engine, batch)
+        files = get_files_for_daterange(args.archive_root, args.date_range, args.instruments)
+
+        if args.bulk_mode:
+            # Updating every index for each inserted row is much slower than building the index
+            # once afterwards
+            deferred_indexes = get_deferrable_indexes()
+            use_existing_index_methods(engine, deferred_indexes)
+            for index in deferred_indexes:
+                logger.info(f"Dropping index {index.name}")
+                index.drop(engine, checkfirst=True)
+        else:
+            deferred_indexes = []
+
+        try:
+            # Insert metadata for the specified files in batches. The same session (and its pooled
+            # connection) is used for every batch. Files are read by a pool of worker processes,
+            # one batch worth at a time so that only a batch of rows is held in memory.
+            with open_db_session(engine) as session, ProcessPoolExecutor(max_workers=args.num_workers) as pool:
+                files = iter(files)
+                while len(file_batch := list(islice(files, args.batch_size))) > 0:
+                    if args.skip_existing:
+                        existing = find_existing_files(session, [str(file) for file in file_batch])
+                        session.commit()
+                        if len(existing) > 0:
+                            logger.info(f"Skipping {len(existing)} files already in the database.")
+                            file_batch = [file for file in file_batch if str(file) not in existing]
+
+                    batch = []
+                    for file, next_row, error in read_files(file_batch, pool):
+                        if error is not None:
+                            with open(error_file, "a") as f:
+                                print(f"Failed to read {file}: {error}", file=f)
+                            continue
+
+                        logger.debug("Finished reading metadata from %s", file)
+                        batch.append(next_row)
+
+                    if len(batch) > 0:
+                        ingest_batch(error_file, session, batch, args.skip_existing)
+        finally:
+            # Always rebuild the indexes, even if the ingest failed
+            for index in deferred_indexes:
+                logger.info(f"Rebuilding index {index.name}")
+                index.create(engine, checkfirst=True)
     except Exception as e:
         logging.error("Caught exception at end of main.", exc_info = True)
         return 1
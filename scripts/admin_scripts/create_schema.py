@@ -4,7 +4,7 @@ import argparse
 import sys
 from datetime import datetime, timezone
 from sqlalchemy import text, func, select
-from lick_archive.db.archive_schema import Base
+from lick_archive.db.archive_schema import Base, set_coord_index_method
 
 from lick_archive.db.db_utils import create_db_engine, open_db_session, execute_db_statement
 
@@ -17,6 +17,8 @@ def get_parser():
     parser.add_argument("database_name", type=str, help = 'Name of the database to create the schema in.')
     parser.add_argument("database_user", type=str, help = 'Name of the database user that has create privileges.')
     parser.add_argument("--read_only_user", type=str, help = 'Name of the database user that should have read only privileges for the new database.')
+    parser.add_argument("--coord_index_method", type=str, choices=["gist", "spgist"], default="gist", help = 'Index method for the coord column. "spgist" requires a pgsphere version with SP-GiST support for spoint. Defaults to "gist".')
+    parser.add_argument("--header_compression", type=str, choices=["pglz", "lz4"], help = 'TOAST compression method for the FITS header column. "lz4" requires PostgreSQL 14+ built with lz4 support. Defaults to the server default.')
     parser.add_argument("--read_write_user", type=str, help = 'Name of the database user that should have read/write privileges for the new database (but no create/delete/drop).')
 
     return parser
@@ -25,10 +27,15 @@ def main(args):
 
     engine = create_db_engine(user=args.database_user, database=args.database_name)
 
+    set_coord_index_method(args.coord_index_method)
     Base.metadata.create_all(engine)
 
     session = open_db_session(engine)
 
+    if args.header_compression is not None:
+        # The headers are mostly repetitive 80 character cards, and are always large enough to be TOASTed
+        session.execute(text(f"ALTER TABLE file_metadata ALTER COLUMN header SET COMPRESSION {args.header_compression}"))
+
     if args.read_write_user is not None:
         session.execute(text("GRANT CONNECT ON DATABASE archive TO " + args.read_write_user))
         session.execute(text("GRANT SELECT, INSERT, UPDATE ON file_metadata TO " + args.read_write_user))
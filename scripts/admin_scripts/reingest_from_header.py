@@ -99,7 +99,7 @@ def regen_metadata_from_header(metadata : FileMetadata) -> FileMetadata:
     """
     hdul = get_hdul_from_string([metadata.header])
 
-    ingest_flags = IngestFlags(int(metadata.ingest_flags,2))
+    ingest_flags = IngestFlags(metadata.ingest_flags)
     # Turn off flags not related to opening the fits file, so they can be reset by the re-reading of the header
     ingest_flags &= (IngestFlags.NO_FITS_END_CARD | IngestFlags.NO_FITS_SIMPLE_CARD | IngestFlags.FITS_VERIFY_ERROR | IngestFlags.INVALID_CHAR)
 
@@ -3,49 +3,92 @@ Retry failures from bulk_ingest_metadata.
 """
 
 import argparse
+import mmap
+import os
+import re
 import sys
 import logging
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from sqlalchemy.exc import IntegrityError
 
 from lick_archive.utils.script_utils import setup_logging, get_unique_file
-from lick_archive.db.db_utils import create_db_engine, insert_one, check_exists
+from lick_archive.db.db_utils import create_db_engine, open_db_session, check_exists, insert_batch, copy_batch
 from lick_archive.db.archive_schema import FileMetadata
-from lick_archive.metadata.reader import read_file
+from lick_archive.metadata.reader import read_files
 
 logger = logging.getLogger(__name__)
 
-def retry_one_file(error_file, failed_file):
-
+# Matches the "Failed to read <file>: <error>" and "Failed to retry <file>: <error>" lines
+# written by bulk_ingest_metadata and this script
+_FAILED_FILE_RE = re.compile(rb"^Failed to (?:read|retry) (\S+)", re.MULTILINE)
+
+def get_failed_files(ingest_failures):
+    """
+    Return the files listed in an ingest failures file.
+    """
+    with open(ingest_failures, "rb") as failures:
+        if os.fstat(failures.fileno()).st_size == 0:
+            # mmap can't map an empty file
+            return
+        # Scan the whole file with one regular expression rather than splitting it line by line
+        with mmap.mmap(failures.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+            for match in _FAILED_FILE_RE.finditer(contents):
+                yield Path(os.fsdecode(match.group(1).rstrip(b':')))
+
+def retry_one_by_one(error_file, engine, session, batch):
+    """
+    Insert a batch of metadata one row at a time, so that a bad row only fails itself.
+
+    Returns: The number of rows inserted.
+    """
+    inserted = 0
+    for row in batch:
+        # Each row gets a savepoint, so a bad row (including a duplicate) only rolls back itself
+        try:
+            with session.begin_nested():
+                insert_batch(session, [row])
+            inserted += 1
+        except Exception as e:
+            # Only look for an existing file when the insert violated a constraint
+            if isinstance(e, IntegrityError) and check_exists(engine, FileMetadata.id, FileMetadata.filename == row['filename'], session=session):
+                logger.info(f"{row['filename']} already exists.")
+                continue
+            with open(error_file, "a") as f:
+                print(f"Failed to retry {row['filename']}: {e}", file=f)
+            logger.error(f"Failed to retry {row['filename']}: {e}")
+    session.commit()
+    return inserted
+
+def retry_batch(error_file, engine, session, batch):
+    """
+    Insert a batch of metadata in one transaction, skipping files that are already in the database.
+    Falls back to inserting one row at a time if that fails.
+
+    Returns: The number of rows inserted.
+    """
     try:
-        logger.info(f"Reading metadata from {failed_file}.")
-        row = read_file(failed_file)
-        logger.info(f"Finished reading metadata from {failed_file}.")
+        inserted = copy_batch(session, batch, skip_existing=True)
+        session.commit()
+        for row in batch:
+            if row['filename'] not in inserted:
+                logger.info(f"{row['filename']} already exists.")
+        return len(inserted)
     except Exception as e:
-        with open(error_file, "a") as f:
-            print(f"Failed to retry {failed_file}: {e}", file=f)
-        logger.error(f"Failed to retry {failed_file}.", exc_info = True)
-        return
+        logger.error(f"Failed to insert batch, retrying one by one: {e}")
+        session.rollback()
+        return retry_one_by_one(error_file, engine, session, batch)
 
-    try:
-        logger.info(f"Inserting data for {failed_file}.")
-        engine = create_db_engine()
-
-        if not check_exists(engine, FileMetadata.id, FileMetadata.filename == row.filename):
-            insert_one(engine, row)
-            logger.info(f"Finished inserting data for {failed_file}.")
-        else:
-            logger.info(f"{failed_file} already exists.")
-    except Exception as e:
-        with open(error_file, "a") as f:
-            print(f"Failed to retry {failed_file}: {e}", file=f)
-        logger.error(f"Failed to retry {failed_file}.", exc_info = True)
-    
 
 def main():
     parser = argparse.ArgumentParser(description='Retry failed files from an "ingest_failures" file created by bulk_metadata_ingest.\n'
                                                  'A log file of the ingest is created in bulk_ingest_<timestamp>.log.\n'
                                                  'A new ingest_failures.n.txt will be created for any files that still fail.')
     parser.add_argument("ingest_failures", type=str, help = 'An ingest failures file from bulk metadata retry. Usually named "ingest_failures.n.txt".')
+    parser.add_argument("--batch_size", type=int, default=1000, help='Number of rows to insert into the database at once, defaults to 1,000')
+    parser.add_argument("--num_workers", type=int, default=os.cpu_count(), help='Number of processes used to read metadata from files. Defaults to the number of CPUs.')
     parser.add_argument("-d", "--dbname", type=str, default='archive', help='Name of the database to connect to. Defaults to "archive".')
     parser.add_argument("-U", "--username", type=str, default='archive', help='Name of the database user to connect with. Defaults ot "archive".')
     parser.add_argument("--log_path", "-l", type=str, help="Directory to write log file to." )
@@ -58,15 +101,28 @@ def main():
     error_file = get_unique_file(Path('.'),"ingest_failures", 'txt')
     logger.info(f"Reading {args.ingest_failures}...")
     try:
-        with open(args.ingest_failures, "r") as failures:
-            for line in failures:
-                if line.startswith('Failed to read') or line.startswith('Failed to retry'):
-                    parts = line.split()
-                    failed_file = parts[3].rstrip(':')
-                else:
-                    continue
-
-                retry_one_file(error_file, Path(failed_file))
+        # One engine and session is used for all of the files, and the new rows are copied into the
+        # database in batches, skipping any files that already exist. The files are read by a pool
+        # of worker processes, one batch worth at a time.
+        engine = create_db_engine(user=args.username, database=args.dbname)
+        failed_files = get_failed_files(args.ingest_failures)
+        total = 0
+        inserted = 0
+        with open_db_session(engine) as session, ProcessPoolExecutor(max_workers=args.num_workers) as pool:
+            while len(file_batch := list(islice(failed_files, args.batch_size))) > 0:
+                batch = []
+                for failed_file, row, error in read_files(file_batch, pool, chunksize=32):
+                    if error is not None:
+                        with open(error_file, "a") as f:
+                            print(f"Failed to retry {failed_file}: {error}", file=f)
+                        continue
+                    batch.append(row)
+
+                if len(batch) > 0:
+                    total += len(batch)
+                    inserted += retry_batch(error_file, engine, session, batch)
+
+        logger.info(f"Inserted {inserted} of {total} files.")
 
     except Exception as e:
         with open(error_file, "a") as f:
@@ -38,7 +38,7 @@ def test_spoint_insert_result_delete():
     # Add a test row
     test_row = FileMetadata(telescope = 'Shane', instrument='Kast Blue', obs_date='2023-09-26 12:00:00',
                     frame_type=FrameType.unknown, filename='data/2023-09/26/shane/dev_test.fits',
-                    ingest_flags='00000000000000000000000000000001',
+                    ingest_flags=1,
                     coord=p)
 
     session.add(test_row)
@@ -57,6 +57,18 @@ def MockDatabase(base_class, rows=None):
 
     return MockDatabaseClass(base_class, rows)
 
+def make_metadata_row(filename, obids=[]):
+    """Create a minimal metadata row for a file, with user access for the given obids."""
+    from datetime import datetime, timezone, date
+    from lick_archive.db.archive_schema import FileMetadata, UserDataAccess
+    from lick_archive.metadata.data_dictionary import Telescope, Instrument, FrameType
+
+    row = FileMetadata(filename=filename, telescope=Telescope.SHANE, instrument=Instrument.KAST_RED,
+                       obs_date=datetime(2019, 5, 30, 12, tzinfo=timezone.utc), frame_type=FrameType.arc,
+                       public_date=date(2020, 5, 30), ingest_flags=0)
+    row.user_access = [UserDataAccess(obid=obid, reason=f"reason {obid}") for obid in obids]
+    return row
+
 def create_mock_view(engine, request=None):
 
     # We define the view in a function so the below imports happen after Django is initialized by the test case
@@ -65,6 +65,24 @@ def django_db(django_setup):
 
 
 
+@pytest.fixture
+def sqlite_engine():
+    """An in-memory sqlite database with the archive schema."""
+    from sqlalchemy import create_engine, event
+    from lick_archive.db.archive_schema import Base
+
+    engine = create_engine("sqlite://")
+
+    # sqlite doesn't have pgsphere, so make spoint() a function that returns NULL
+    @event.listens_for(engine, "connect")
+    def add_spoint(dbapi_connection, connection_record):
+        dbapi_connection.create_function("spoint", -1, lambda *args: None)
+
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+
+
 @pytest.fixture(autouse=True)
 def mock_external():
     # Mock external imports that don't work on dev machines
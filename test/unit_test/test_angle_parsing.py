@@ -1,3 +1,5 @@
+import pytest
+
 
 
 def test_angle_field_space_regex():
@@ -343,3 +345,29 @@ def test_angle_decimal_unit_regex():
 
     for s in invalid_strings:
         assert CoordField._decimal_unit.fullmatch(s) is None
+
+def test_convert_sexagesimal():
+    from astropy.coordinates import Angle
+    import astropy.units
+    from lick_archive.db.pgsphere import SPoint
+
+    # The fast path should agree with astropy
+    for value in ['12:30:45.5', '-00:30:00', '+45 10 59.99', '23:59:59.9', '-89:59:59', '0:0:0']:
+        assert SPoint.convert_sexagesimal(value) == pytest.approx(Angle(value, unit=astropy.units.deg).value)
+    for value in ['12:30:45.5', '-00:30:00', '23:59:59.9', '0:0:0']:
+        assert SPoint.convert_sexagesimal(value, hours=True) == pytest.approx(Angle(Angle(value, unit=astropy.units.hourangle), astropy.units.deg).value)
+
+    # Values handled by astropy
+    assert SPoint.convert_sexagesimal('1:02:60', hours=True) == pytest.approx(15.75)
+    assert SPoint.convert_sexagesimal('10h20m30s', hours=True) == pytest.approx(155.125)
+    assert SPoint.convert_sexagesimal(None) is None
+    with pytest.raises(ValueError):
+        SPoint.convert_sexagesimal('29829:03:39.4', hours=True)
+    with pytest.raises(ValueError):
+        SPoint.convert_sexagesimal('bad')
+
+    # Repeated values come from the cache
+    from lick_archive.db.pgsphere import _sexagesimal_to_degrees
+    hits = _sexagesimal_to_degrees.cache_info().hits
+    assert SPoint.convert_sexagesimal('10h20m30s', hours=True) == pytest.approx(155.125)
+    assert _sexagesimal_to_degrees.cache_info().hits == hits + 1
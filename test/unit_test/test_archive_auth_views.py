@@ -0,0 +1,51 @@
+from test_utils import basic_django_setup
+
+@basic_django_setup
+def test_login_user_failed_login_throttle(monkeypatch):
+    from types import SimpleNamespace
+    from django.test import RequestFactory
+    from django.core.cache import cache
+    from http import HTTPStatus
+    import lick_archive.apps.archive_auth.views as views
+
+    # Count the calls to authenticate, which only succeeds for "goodpassword"
+    auth_calls = []
+    def mock_authenticate(request, username, password):
+        auth_calls.append((username, password))
+        return request.user if password == "goodpassword" else None
+    monkeypatch.setattr(views, "authenticate", mock_authenticate)
+    monkeypatch.setattr(views, "login", lambda request, user: None)
+    monkeypatch.setattr(views, "MAX_FAILED_LOGINS", 3)
+
+    cache.clear()
+    factory = RequestFactory()
+    def login(username, password, client="10.0.0.1"):
+        request = factory.post("/login", data={"username": username, "password": password}, REMOTE_ADDR=client)
+        request.user = SimpleNamespace(username=username, get_username=lambda: username, is_authenticated=False)
+        return views.login_user(request)
+
+    # Distinct bad passwords are each checked until the limit for the username is reached
+    for password in ["wrong1", "wrong2", "wrong3"]:
+        assert login("testuser", password).status_code == HTTPStatus.FORBIDDEN
+    assert len(auth_calls) == 3
+
+    # After that the password isn't checked, even from another client or with the right password
+    assert login("testuser", "wrong4", client="10.0.0.2").status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert login("testuser", "goodpassword", client="10.0.0.2").status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert len(auth_calls) == 3
+
+    # The first client has also reached the limit, for any username
+    assert login("testuser2", "wrong1").status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert len(auth_calls) == 3
+
+    # Other usernames from other clients are unaffected, and a successful login clears the username's failures
+    assert login("testuser2", "wrong1", client="10.0.0.3").status_code == HTTPStatus.FORBIDDEN
+    assert login("testuser2", "goodpassword", client="10.0.0.3").status_code == HTTPStatus.OK
+    assert login("testuser2", "wrong2", client="10.0.0.4").status_code == HTTPStatus.FORBIDDEN
+    assert len(auth_calls) == 6
+
+    # Once the failures expire, the password is checked again
+    cache.clear()
+    assert login("testuser", "goodpassword").status_code == HTTPStatus.OK
+    assert len(auth_calls) == 7
+    cache.clear()
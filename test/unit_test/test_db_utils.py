@@ -0,0 +1,146 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from test_utils import make_metadata_row
+
+def test_insert_batch(sqlite_engine):
+    from lick_archive.db.archive_schema import FileMetadata, UserDataAccess
+    from lick_archive.db.db_utils import insert_batch, file_metadata_to_dict
+
+    rows = [make_metadata_row("file1.fits", [1, 2]), make_metadata_row("file2.fits", []), make_metadata_row("file3.fits", [3])]
+    with Session(sqlite_engine) as session:
+        insert_batch(session, [file_metadata_to_dict(row) for row in rows])
+        session.commit()
+
+        ids = dict(session.execute(select(FileMetadata.filename, FileMetadata.id)).all())
+        assert sorted(ids.keys()) == ["file1.fits", "file2.fits", "file3.fits"]
+
+        access = sorted(session.execute(select(UserDataAccess.file_id, UserDataAccess.obid, UserDataAccess.reason)).all())
+        assert access == [(ids["file1.fits"], 1, "reason 1"), (ids["file1.fits"], 2, "reason 2"), (ids["file3.fits"], 3, "reason 3")]
+
+def test_batched_insert(sqlite_engine):
+    from lick_archive.db.archive_schema import FileMetadata, UserDataAccess
+    from lick_archive.db.db_utils import BatchedDBOperation
+
+    with BatchedDBOperation(sqlite_engine, 2) as batch:
+        batch.insert(make_metadata_row("file1.fits", [1]))
+        batch.insert(make_metadata_row("file2.fits", [2]))
+        batch.insert(make_metadata_row("file3.fits", [3]))
+
+    assert batch.total == 3
+    assert batch.success == 3
+    assert len(batch.failures) == 0
+
+    with Session(sqlite_engine) as session:
+        assert sorted(session.scalars(select(FileMetadata.filename)).all()) == ["file1.fits", "file2.fits", "file3.fits"]
+        assert sorted(session.scalars(select(UserDataAccess.obid)).all()) == [1, 2, 3]
+
+def test_update_file_metadata(sqlite_engine):
+    from lick_archive.db.archive_schema import FileMetadata, UserDataAccess
+    from lick_archive.db.db_utils import insert_batch, update_file_metadata, file_metadata_to_dict
+
+    with Session(sqlite_engine) as session:
+        insert_batch(session, [file_metadata_to_dict(make_metadata_row("file1.fits", [1, 2]))])
+        session.commit()
+        id = session.scalars(select(FileMetadata.id)).one()
+
+        new_row = make_metadata_row("file1.fits", [3, 4, 5])
+        new_row.object = "new object"
+        update_file_metadata(session, id, new_row, new_row.user_access)
+        session.commit()
+
+        assert session.scalars(select(FileMetadata.object)).one() == "new object"
+        access = sorted(session.execute(select(UserDataAccess.file_id, UserDataAccess.obid, UserDataAccess.reason)).all())
+        assert access == [(id, 3, "reason 3"), (id, 4, "reason 4"), (id, 5, "reason 5")]
+
+def test_find_existing_files(sqlite_engine):
+    from lick_archive.db.db_utils import insert_batch, find_existing_files, file_metadata_to_dict
+
+    with Session(sqlite_engine) as session:
+        insert_batch(session, [file_metadata_to_dict(make_metadata_row(filename, [])) for filename in ["file1.fits", "file2.fits"]])
+        session.commit()
+
+        assert find_existing_files(session, ["file1.fits", "file3.fits", "file2.fits"]) == {"file1.fits", "file2.fits"}
+        assert find_existing_files(session, ["file3.fits"]) == set()
+
+def test_insert_batch_duplicate(sqlite_engine):
+    from sqlalchemy.exc import IntegrityError
+    from lick_archive.db.archive_schema import FileMetadata
+    from lick_archive.db.db_utils import insert_batch, file_metadata_to_dict
+
+    with Session(sqlite_engine) as session:
+        insert_batch(session, [file_metadata_to_dict(make_metadata_row("file1.fits", []))])
+        session.commit()
+
+        # A duplicate filename fails right away rather than being retried
+        start = datetime.now()
+        with pytest.raises(IntegrityError):
+            insert_batch(session, [file_metadata_to_dict(make_metadata_row(filename, [])) for filename in ["file2.fits", "file1.fits"]])
+        assert (datetime.now() - start).total_seconds() < 4
+        session.rollback()
+
+        assert session.scalars(select(FileMetadata.filename)).all() == ["file1.fits"]
+
+def test_batched_insert_retry(sqlite_engine, monkeypatch):
+    from lick_archive.db.db_utils import BatchedDBOperation
+
+    # A duplicate filename makes the batch fail, so each row is retried individually
+    with BatchedDBOperation(sqlite_engine, 10) as batch:
+        batch.insert(make_metadata_row("file1.fits", [1]))
+    with BatchedDBOperation(sqlite_engine, 10) as batch:
+        batch.insert(make_metadata_row("file2.fits", [2]))
+        batch.insert(make_metadata_row("file1.fits", [1]))
+
+    assert batch.success == 1
+    assert batch.success_retries == 1
+    assert [failure[0:2] for failure in batch.failures] == [("file1.fits", "insert")]
+
+    # If committing the retried rows fails, all of them are failures
+    def fail_commit(self):
+        raise RuntimeError("Commit failed")
+    monkeypatch.setattr(Session, "commit", fail_commit)
+    with BatchedDBOperation(sqlite_engine, 10) as batch:
+        batch.insert(make_metadata_row("file3.fits", [3]))
+        batch.insert(make_metadata_row("file1.fits", [1]))
+    monkeypatch.undo()
+
+    assert batch.success == 0
+    assert sorted(failure[0] for failure in batch.failures) == ["file1.fits", "file3.fits"]
+
+def test_batched_insert_update_order(sqlite_engine):
+    from itertools import groupby
+    from sqlalchemy import event
+    from lick_archive.db.archive_schema import FileMetadata
+    from lick_archive.db.db_utils import BatchedDBOperation
+
+    with BatchedDBOperation(sqlite_engine, 10) as batch:
+        batch.insert(make_metadata_row("file1.fits"))
+    with Session(sqlite_engine) as session:
+        id = session.scalars(select(FileMetadata.id)).one()
+
+    # Record the statements run against the file_metadata table
+    statements = []
+    @event.listens_for(sqlite_engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        if " file_metadata " in statement:
+            statements.append(statement.split()[0])
+
+    updated_row = make_metadata_row("file1.fits")
+    updated_row.object = "updated object"
+    with BatchedDBOperation(sqlite_engine, 10) as batch:
+        batch.insert(make_metadata_row("file2.fits"))
+        batch.insert(make_metadata_row("file3.fits"))
+        batch.update(id, updated_row)
+        batch.insert(make_metadata_row("file4.fits"))
+
+    assert batch.success == 4
+    assert len(batch.failures) == 0
+    # The update stays between the inserts it was queued between. (sqlite may run a multi-row
+    # INSERT as several statements, so only the runs of each statement type are compared.)
+    assert [statement for statement, run in groupby(statements)] == ["INSERT", "UPDATE", "INSERT"]
+    with Session(sqlite_engine) as session:
+        assert session.scalars(select(FileMetadata.object).where(FileMetadata.id == id)).one() == "updated object"
+        assert sorted(session.scalars(select(FileMetadata.filename)).all()) == ["file1.fits", "file2.fits", "file3.fits", "file4.fits"]
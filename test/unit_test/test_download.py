@@ -0,0 +1,70 @@
+import pytest
+from datetime import datetime, date, timezone
+from pathlib import Path
+
+from django.http import QueryDict
+
+from test_utils import MockDatabase, create_test_request, basic_django_setup
+
+from lick_archive.db.archive_schema import Base, FileMetadata
+from lick_archive.metadata.data_dictionary import FrameType
+
+def make_download_row(filename, file_size):
+    return FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date=datetime(2019, 6, 1),
+                        frame_type=FrameType.science, object="object", filename=filename, ingest_flags=0,
+                        public_date=date(1970, 1, 1), file_size=file_size,
+                        mtime=datetime(2019, 6, 2, tzinfo=timezone.utc))
+
+download_test_rows = [make_download_row(f"/data/2019-06/01/shane/b{i}.fits", 1024*1024) for i in range(1, 5)]
+
+def create_download_view(engine, request):
+    from lick_archive.apps.download.views import DownloadMultiView
+    view = DownloadMultiView()
+    view._db_engine = engine
+    view.request = request
+    view.format_kwarg = None
+    return view
+
+@basic_django_setup
+def test_get_validated_files():
+    from rest_framework.exceptions import NotFound
+
+    request = create_test_request("download/", data=QueryDict(""), user="test_user", obid=1)
+    with MockDatabase(Base, download_test_rows) as mock_db:
+        view = create_download_view(mock_db.engine, request)
+
+        # The requested order, and any duplicates, are kept
+        files = ["2019-06/01/shane/b3.fits", "2019-06/01/shane/b1.fits", "2019-06/01/shane/b3.fits"]
+        validated_files = view._get_validated_files(files)
+        assert [path for path, metadata in validated_files] == [Path("/data", file) for file in files]
+        assert all(metadata["file_size"] == 1024*1024 for path, metadata in validated_files)
+
+        with pytest.raises(NotFound):
+            view._get_validated_files(["2019-06/01/shane/b1.fits", "2019-06/01/shane/r1.fits"])
+
+@basic_django_setup
+def test_get_validated_files_max_size(monkeypatch):
+    from rest_framework.exceptions import APIException
+    from lick_archive.apps.download import views
+
+    # Allow only 3 MiB
+    monkeypatch.setattr(views.lick_archive_config.download, "max_tarball_size", 3)
+    request = create_test_request("download/", data=QueryDict(""), user="test_user", obid=1)
+    with MockDatabase(Base, download_test_rows) as mock_db:
+        view = create_download_view(mock_db.engine, request)
+        assert len(view._get_validated_files([f"2019-06/01/shane/b{i}.fits" for i in range(1, 4)])) == 3
+        with pytest.raises(APIException, match="exceeded maximum"):
+            view._get_validated_files([f"2019-06/01/shane/b{i}.fits" for i in range(1, 5)])
+
+@basic_django_setup
+def test_get_tar_info():
+    from lick_archive.apps.download.views import DownloadMultiView
+
+    view = DownloadMultiView()
+    tar_info = view._get_tar_info("data-2019-06-01-shane/b1.fits", {"file_size": 100, "mtime": datetime(2019, 6, 2, 0, 0, 1, 500, tzinfo=timezone.utc)})
+    assert tar_info.name == "data-2019-06-01-shane/b1.fits"
+    assert tar_info.size == 100
+    assert tar_info.mtime == int(datetime(2019, 6, 2, 0, 0, 1, tzinfo=timezone.utc).timestamp())
+
+    # Without a size or mtime, the stream will stat the file
+    assert view._get_tar_info("b1.fits", {"file_size": None, "mtime": None}) is None
@@ -0,0 +1,90 @@
+import pytest
+from pathlib import Path
+from datetime import date
+
+def test_parse_file_name():
+    from lick_archive.metadata.metadata_utils import parse_file_name
+
+    assert parse_file_name("/data/2019-05/30/shane/b1001.fits") == ("2019-05-30", "shane")
+    assert parse_file_name(Path("/data/2019-05/30/AO/m190530_0001.fits")) == ("2019-05-30", "AO")
+    assert parse_file_name("2019-05/30/shane/b1001.fits") == ("2019-05-30", "shane")
+
+    # Missing directories are returned as empty strings
+    assert parse_file_name("shane/b1001.fits") == ("-", "shane")
+    assert parse_file_name("b1001.fits") == ("-", "")
+
+def test_parse_dir_date():
+    from lick_archive.metadata.metadata_utils import parse_dir_date
+
+    assert parse_dir_date("2019-05-30") == date(2019, 5, 30)
+    assert parse_dir_date("2019-02-30") is None
+    assert parse_dir_date("-") is None
+    assert parse_dir_date("data-30") is None
+
+def test_get_shane_lamp_status():
+    from astropy.io import fits
+    from lick_archive.metadata.metadata_utils import get_shane_lamp_status, SHANE_DOME_LAMPS, SHANE_ARC_LAMPS
+
+    header = fits.Header()
+    for name in ['1', '2', '3', '4', '5', 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K']:
+        header[f'LAMPSTA{name}'] = 'off'
+    assert get_shane_lamp_status(header) == 0
+
+    header['LAMPSTA2'] = 'on'
+    header['LAMPSTAK'] = True
+    lamps = get_shane_lamp_status(header)
+    assert lamps == 0b1000000000000010
+    assert lamps & SHANE_DOME_LAMPS
+    assert lamps & SHANE_ARC_LAMPS
+
+    header['LAMPSTA2'] = 'ONCE'
+    header['LAMPSTAK'] = False
+    header['LAMPSTAA'] = 'On'
+    lamps = get_shane_lamp_status(header)
+    assert lamps == 0b0000000000100000
+    assert not lamps & SHANE_DOME_LAMPS
+
+    del header['LAMPSTA3']
+    assert get_shane_lamp_status(header) is None
+
+    del header['LAMPSTA1']
+    assert get_shane_lamp_status(header) is None
+    assert get_shane_lamp_status(fits.Header()) is None
+
+def test_parse_utc_datetime():
+    from datetime import datetime, timezone, timedelta
+    from dateutil.parser import parse
+    from lick_archive.metadata.metadata_utils import parse_utc_datetime, dir_date_noon
+
+    assert parse_utc_datetime("2019-05-30T01:02:03.45") == datetime(2019, 5, 30, 1, 2, 3, 450000, tzinfo=timezone.utc)
+    assert parse_utc_datetime("2019-05-30T01:02:03-08:00") == datetime(2019, 5, 30, 9, 2, 3, tzinfo=timezone.utc)
+    # Not ISO, falls back to dateutil
+    assert parse_utc_datetime("2019-05-30 1:02:03") == datetime(2019, 5, 30, 1, 2, 3, tzinfo=timezone.utc)
+    with pytest.raises(ValueError):
+        parse_utc_datetime("not a date")
+
+    assert dir_date_noon("2019-05-30") == parse("2019-05-30T12:00:00-08:00")
+    assert dir_date_noon("2019-05-30").utcoffset() == timedelta(hours=-8)
+    with pytest.raises(ValueError):
+        dir_date_noon("2019-02-30")
+
+def test_header_to_text():
+    from astropy.io import fits
+    from lick_archive.metadata.metadata_utils import header_to_text
+
+    header = fits.Header()
+    header['OBJECT'] = 'test'
+    header['OBSERVER'] = 'someone'
+    text, valid = header_to_text(header)
+    assert valid is True
+    assert text == header.tostring(sep='\n', endcard=False, padding=False)
+    assert fits.Header.fromstring(text, sep='\n') == header
+
+    # Astropy won't create a card with a NULL, so mock a header read from a bad file
+    class BadHeader:
+        def tostring(self, sep, endcard, padding):
+            return text.replace('test', 'te\x00t')
+
+    fixed_text, valid = header_to_text(BadHeader())
+    assert valid is False
+    assert fixed_text == text.replace('test', 'te t')
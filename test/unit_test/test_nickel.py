@@ -34,7 +34,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_SPEC
     assert row.filename == str(path)
     assert row.obs_date == datetime(2006, 12, 6, 21, 0, 4, 20000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.NO_OBJECT_IN_HEADER | IngestFlags.NO_OBSTYPE)
+    assert row.ingest_flags == IngestFlags.NO_OBJECT_IN_HEADER | IngestFlags.NO_OBSTYPE
     assert row.exptime == 1.0
     assert row.ra == '05:47:17.4'
     assert row.dec == '64:11:41.0'
@@ -66,7 +66,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_DIR
     assert row.filename == str(path)
     assert row.obs_date == datetime(2007, 3, 18, 7, 37, 5, 660000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.CLEAR)
+    assert row.ingest_flags == IngestFlags.CLEAR
     assert row.exptime == 0.0
     assert row.ra == '09:57:34.6'
     assert row.dec == '-00:30:56.0'
@@ -97,7 +97,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_DIR
     assert row.filename == str(path)
     assert row.obs_date == datetime(2019, 5, 14, 18, 0, 19, 200000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.CLEAR)
+    assert row.ingest_flags == IngestFlags.CLEAR
     assert row.exptime == 15.0
     assert row.ra == 20.84348487854
     assert row.dec == 39.75394058228
@@ -128,7 +128,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_DIR
     assert row.filename == str(path)
     assert row.obs_date == datetime(2007, 3, 18, 7, 37, 5, 660000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.NO_OBSTYPE)
+    assert row.ingest_flags == IngestFlags.NO_OBSTYPE
     assert row.exptime == 0.0
     assert row.ra == '09:57:34.6'
     assert row.dec == '-00:30:56.0'
@@ -159,7 +159,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_DIR
     assert row.filename == str(path)
     assert row.obs_date == datetime(2019, 5, 7, 4, 14, 46, 960000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.CLEAR)
+    assert row.ingest_flags == IngestFlags.CLEAR
     assert row.exptime == 0.0
     assert row.ra == 167.069442749
     assert row.dec == 39.94518280029
@@ -190,7 +190,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_SPEC
     assert row.filename == str(path)
     assert row.obs_date == datetime(2007, 4, 25, 3, 8, 54, 0, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.CLEAR)
+    assert row.ingest_flags == IngestFlags.CLEAR
     assert row.exptime == 30.0
     assert row.ra == '09:14:45.8'
     assert row.dec == '-07:31:40.0'
@@ -221,7 +221,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_SPEC
     assert row.filename == str(path)
     assert row.obs_date == datetime(2006, 9, 21, 9, 21, 18, 970000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.CLEAR)
+    assert row.ingest_flags == IngestFlags.CLEAR
     assert row.exptime == 25.0
     assert row.ra == '01:00:59.4'
     assert row.dec == '13:30:35.0'
@@ -252,7 +252,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_SPEC
     assert row.filename == str(path)
     assert row.obs_date == datetime(2006, 12, 7, 5, 9, 4, 770000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.CLEAR)
+    assert row.ingest_flags == IngestFlags.CLEAR
     assert row.exptime == 2.0
     assert row.ra == '00:15:01.8'
     assert row.dec == '20:15:02.0'
@@ -283,7 +283,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_SPEC
     assert row.filename == str(path)
     assert row.obs_date == datetime(2007, 3, 30, 10, 35, 36, 520000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.CLEAR)
+    assert row.ingest_flags == IngestFlags.CLEAR
     assert row.exptime == 2.0
     assert row.ra == '12:23:03.4'
     assert row.dec == '27:33:53.0'
@@ -314,7 +314,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_DIR
     assert row.filename == str(path)
     assert row.obs_date == datetime(2019, 5, 25, 7, 31, 59, 160000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.CLEAR)
+    assert row.ingest_flags == IngestFlags.CLEAR
     assert row.exptime == 80.13
     assert row.ra == 217.7646026611
     assert row.dec == 28.00996017456
@@ -347,7 +347,7 @@ def test_nickel_frame_type():
     assert row.instrument == Instrument.NICKEL_SPEC
     assert row.filename == str(path)
     assert row.obs_date == datetime(2006, 12, 6, 21, 0, 4, 20000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.NO_OBSTYPE)
+    assert row.ingest_flags == IngestFlags.NO_OBSTYPE
     assert row.exptime == 1
     assert row.ra == '05:47:17.4'
     assert row.dec == '64:11:41.0'
@@ -418,7 +418,7 @@ def test_nickel_date():
     assert row.instrument == Instrument.NICKEL_DIR
     assert row.filename == str(path)
     assert row.obs_date == datetime(2018, 6, 25, 2, 37, 11, 130000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.CLEAR)
+    assert row.ingest_flags == IngestFlags.CLEAR
     assert row.exptime == 3
     assert row.ra == 190.7661437988
     assert row.dec == -5.044168949127
@@ -451,7 +451,7 @@ def test_nickel_date():
     assert row.instrument == Instrument.NICKEL_DIR
     assert row.filename == str(path)
     assert row.obs_date == datetime(2012, 1, 25, 20, 0, 0, 0, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.USE_DIR_DATE)
+    assert row.ingest_flags == IngestFlags.USE_DIR_DATE
     assert row.exptime == 20
     assert row.ra == '08:51:48.1'
     assert row.dec == '11:49:36.0'
@@ -485,7 +485,7 @@ def test_nickel_coord():
     assert row.instrument == Instrument.NICKEL_DIR
     assert row.filename == str(path)
     assert row.obs_date == datetime(2012, 1, 26, 7, 7, 32, 630000, tzinfo=timezone.utc)
-    assert row.ingest_flags == "{:032b}".format(IngestFlags.NO_COORD)
+    assert row.ingest_flags == IngestFlags.NO_COORD
     assert row.exptime == 20
     assert row.ra is None
     assert row.dec is None
@@ -12,16 +12,16 @@ from lick_archive.metadata.data_dictionary import FrameType
 
 # Test rows shared between most tests
 test_rows = [ FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                   frame_type=FrameType.arc,     object="NA", filename="testfile1.fits",  ingest_flags='00000000000000000000000000000000',
+                   frame_type=FrameType.arc,     object="NA", filename="testfile1.fits",  ingest_flags=0,
                    public_date=date(1970, 1, 1)),
               FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2018, month=12, day=1, hour=0, minute=0, second=0),
-                   frame_type=FrameType.science, object="object 1", filename="testfile2.fits",  ingest_flags='00000000000000000000000000000000',                       
+                   frame_type=FrameType.science, object="object 1", filename="testfile2.fits",  ingest_flags=0,                       
                    public_date=date(1970, 1, 1)),
               FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                   frame_type=FrameType.science, object="object 2", filename="testfile3.fits",  ingest_flags='00000000000000000000000000000000',                       
+                   frame_type=FrameType.science, object="object 2", filename="testfile3.fits",  ingest_flags=0,                       
                    public_date=date(1970, 1, 1)),
               FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                   frame_type=FrameType.science, object="object 3", filename="testfile4.fits",  ingest_flags='00000000000000000000000000000000',
+                   frame_type=FrameType.science, object="object 3", filename="testfile4.fits",  ingest_flags=0,
                    public_date=date(1970, 1, 1)),
 ]
 
@@ -87,22 +87,22 @@ def test_multi_page_result(tmp_path):
     "Test multiple pages of results from a query."
 
     additional_rows = [ FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                             frame_type=FrameType.arc,     object="None", filename="testfile5.fits",  ingest_flags='00000000000000000000000000000000',
+                             frame_type=FrameType.arc,     object="None", filename="testfile5.fits",  ingest_flags=0,
                              public_date=date(1970, 1, 1)),
                         FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2018, month=12, day=1, hour=0, minute=0, second=0),
-                             frame_type=FrameType.science, object="object 5", filename="testfile6.fits",  ingest_flags='00000000000000000000000000000000',
+                             frame_type=FrameType.science, object="object 5", filename="testfile6.fits",  ingest_flags=0,
                              public_date=date(1970, 1, 1)),
                         FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                             frame_type=FrameType.science, object="object 6", filename="testfile7.fits",  ingest_flags='00000000000000000000000000000000',
+                             frame_type=FrameType.science, object="object 6", filename="testfile7.fits",  ingest_flags=0,
                              public_date=date(1970, 1, 1)),
                         FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                             frame_type=FrameType.science, object="object 5", filename="testfile8.fits",  ingest_flags='00000000000000000000000000000000',
+                             frame_type=FrameType.science, object="object 5", filename="testfile8.fits",  ingest_flags=0,
                              public_date=date(1970, 1, 1)),
                         FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                             frame_type=FrameType.science, object="object 3", filename="testfile9.fits",  ingest_flags='00000000000000000000000000000000',
+                             frame_type=FrameType.science, object="object 3", filename="testfile9.fits",  ingest_flags=0,
                              public_date=date(1970, 1, 1)),
                         FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                             frame_type=FrameType.science, object="object 4", filename="testfile10.fits",  ingest_flags='00000000000000000000000000000000',
+                             frame_type=FrameType.science, object="object 4", filename="testfile10.fits",  ingest_flags=0,
                              public_date=date(1970, 1, 1)),
     ]
 
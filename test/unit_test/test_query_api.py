@@ -21,30 +21,30 @@ not_public_date = date.today() + timedelta(days=30)
 # Test rows shared between most tests
 public_test_rows = [ 
     FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                 frame_type=FrameType.arc,     object=None, filename="/data/testfile1.fits",  ingest_flags='00000000000000000000000000000000',
+                 frame_type=FrameType.arc,     object=None, filename="/data/testfile1.fits",  ingest_flags=0,
                  public_date=date(1970, 1, 1)),
     FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2018, month=12, day=1, hour=0, minute=0, second=0),
-                 frame_type=FrameType.science, object="object 1", filename="/data/testfile2.fits",  ingest_flags='00000000000000000000000000000000',
+                 frame_type=FrameType.science, object="object 1", filename="/data/testfile2.fits",  ingest_flags=0,
                  public_date=date(1970, 1, 1)),
     FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                 frame_type=FrameType.science, object="object 2", filename="/data/testfile3.fits",  ingest_flags='00000000000000000000000000000000',
+                 frame_type=FrameType.science, object="object 2", filename="/data/testfile3.fits",  ingest_flags=0,
                  public_date=date(1970, 1, 1)),
     FileMetadata(telescope="Shane", instrument="Kast Blue", obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                 frame_type=FrameType.science, object="object 2", filename="/data/testfile4.fits",  ingest_flags='00000000000000000000000000000000',
+                 frame_type=FrameType.science, object="object 2", filename="/data/testfile4.fits",  ingest_flags=0,
                  public_date=date(1970, 1, 1)),
     FileMetadata(telescope="Shane", instrument="ShaneAO/ShARCS", obs_date = datetime(year=2022, month=6, day=1, hour=0, minute=0, second=0),
-                 frame_type=FrameType.science, object="object 2", filename="/data/testfile5.fits",  ingest_flags='00000000000000000000000000000000',
+                 frame_type=FrameType.science, object="object 2", filename="/data/testfile5.fits",  ingest_flags=0,
                  public_date=date(1970, 1, 1)),
 ]
 
 private_test_rows = [
     FileMetadata(telescope="Shane", instrument="ShaneAO/ShARCS", obs_date = datetime(year=2022, month=6, day=1, hour=0, minute=0, second=0),
-                 frame_type=FrameType.science, object="object 2", filename="/data/testfile6.fits",  ingest_flags='00000000000000000000000000000000',
+                 frame_type=FrameType.science, object="object 2", filename="/data/testfile6.fits",  ingest_flags=0,
                  public_date=not_public_date, user_access=[
                      UserDataAccess(obid=1, reason="Test Reason")
                  ]),
     FileMetadata(telescope="Shane", instrument="ShaneAO/ShARCS", obs_date = datetime(year=2022, month=6, day=1, hour=0, minute=0, second=0),
-                 frame_type=FrameType.science, object="object 2", filename="/data/testfile7.fits",  ingest_flags='00000000000000000000000000000000',
+                 frame_type=FrameType.science, object="object 2", filename="/data/testfile7.fits",  ingest_flags=0,
                  public_date=not_public_date, user_access=[
                      UserDataAccess(obid=2, reason="Test Reason")
                  ]),
@@ -489,3 +489,19 @@ def test_multiple_field_query():
         assert "id" in response.data["results"][0]
         assert response.data["results"][0]["filename"]  == "testfile5.fits"
         assert response.data["results"][0]["obs_date"]  == datetime(year=2022, month = 6, day = 1)
+
+@basic_django_setup
+def test_convert_angles():
+    """Test that converting a list of angles matches converting each one"""
+    from lick_archive.apps.query.views import QueryView
+
+    view = QueryView()
+    angle_values = ["12:30:30.5", "213.5", "-0:10:5.1656", "12h30m30s", "-5.1656", "not an angle", "+37 25 57.0", "180"]
+    for coord_format in ["hmsdms", "degrees"]:
+        for hour_angle in [True, False]:
+            expected = [view._convertAngle(value, coord_format, hour_angle) for value in angle_values]
+            assert view._convertAngles(angle_values, coord_format, hour_angle) == expected
+
+    # One bad value among sexagesimal values is left asis, without affecting the others
+    assert view._convertAngles(["12:30:30", "bad:value"], "degrees", True) == [view._convertAngle("12:30:30", "degrees", True), "bad:value"]
+    assert view._convertAngles([], "hmsdms") == []
@@ -3,6 +3,7 @@ from astropy.logger import AstropyUserWarning
 from astropy.io.fits.verify import VerifyWarning
 
 from pathlib import Path
+import shutil
 
 
 def test_open_fits_file():
@@ -48,10 +49,10 @@ def test_open_fits_file():
     assert ingest_flags == IngestFlags.FITS_VERIFY_ERROR
     hdul.close()
 
-    with pytest.warns((AstropyUserWarning,VerifyWarning)):    
-        hdul, ingest_flags = open_fits_file(test_data_dir / 'SC2_20190502185845.jpg')
-        assert hdul is None
-        assert ingest_flags & IngestFlags.UNKNOWN_FORMAT != 0
+    # Binary files are rejected without being parsed by astropy
+    hdul, ingest_flags = open_fits_file(test_data_dir / 'SC2_20190502185845.jpg')
+    assert hdul is None
+    assert ingest_flags == IngestFlags.UNKNOWN_FORMAT
 
     with pytest.warns(VerifyWarning):    
         hdul, ingest_flags = open_fits_file(test_data_dir / 'not_fits_text.txt')
@@ -61,21 +62,76 @@ def test_open_fits_file():
     with pytest.raises(FileNotFoundError):
         hdul, ingest_flags = open_fits_file(test_data_dir / 'i_do_not_exist.fits')
 
-def test_read_row():
+def test_read_row(tmp_path):
     from lick_archive.metadata.reader import read_file
     from lick_archive.metadata.data_dictionary import Instrument
 
     test_data_dir = Path(__file__).parent / 'test_data'
 
+    # Files in a directory a reader supports are opened to check their header
+    instr_dir = tmp_path / '2012-01' / '18' / 'shane'
+    instr_dir.mkdir(parents=True)
+    shutil.copy(test_data_dir / 'not_from_lick_fits.fits', instr_dir)
+    shutil.copy(test_data_dir / 'not_fits_text.txt', instr_dir)
+
     with pytest.raises(ValueError, match = 'Unknown FITS file:'):
-        row = read_file(test_data_dir / 'not_from_lick_fits.fits' )
+        row = read_file(instr_dir / 'not_from_lick_fits.fits' )
 
     with pytest.raises(ValueError, match = 'Unknown file format:'):
         with pytest.warns(VerifyWarning):
-            row = read_file(test_data_dir / 'not_fits_text.txt' )
+            row = read_file(instr_dir / 'not_fits_text.txt' )
     
     with pytest.raises(FileNotFoundError):
+        row = read_file(instr_dir / 'i_do_not_exist.fits')
+
+    # Files in directories no reader supports are rejected without being opened
+    with pytest.raises(ValueError, match = 'Unsupported file path:'):
+        row = read_file(test_data_dir / 'not_from_lick_fits.fits' )
+
+    with pytest.raises(ValueError, match = 'Unsupported file path:'):
         row = read_file(test_data_dir / 'i_do_not_exist.fits')
 
+    # AO files from before ShARCS
+    with pytest.raises(ValueError, match = 'Unsupported file path:'):
+        row = read_file(test_data_dir / '2012-01' / '18' / 'AO' / 'i_do_not_exist.fits')
+
     row = read_file(test_data_dir / '2012-01' / '18' / 'shane' / 'good_2012_01_18_r1002.fits')
     assert row.instrument ==  Instrument.KAST_RED
+
+def test_readers_for_directory():
+    from lick_archive.metadata.reader import _readers_for_directory
+    from lick_archive.metadata.shane_kast import ShaneKastReader
+    from lick_archive.metadata.shane_ao_sharcs import ShaneAO_ShARCS
+    from lick_archive.metadata.nickel import NickelReader
+
+    assert _readers_for_directory(Path('2012-01/18/shane')) == (ShaneKastReader,)
+    assert _readers_for_directory(Path('2019-04/16/AO')) == (ShaneAO_ShARCS,)
+    assert _readers_for_directory(Path('2012-01/18/AO')) == ()
+    assert _readers_for_directory(Path('2012-01/18/nickel')) == (NickelReader,)
+    assert _readers_for_directory(Path('test_data')) == ()
+
+    # Files in the same directory share the cached result
+    hits = _readers_for_directory.cache_info().hits
+    assert _readers_for_directory(Path('2012-01/18/shane')) == (ShaneKastReader,)
+    assert _readers_for_directory.cache_info().hits == hits + 1
+
+def test_read_files():
+    from concurrent.futures import ThreadPoolExecutor
+    from lick_archive.metadata.reader import read_files
+    from lick_archive.metadata.data_dictionary import Instrument
+
+    test_data_dir = Path(__file__).parent / 'test_data'
+    good_file = test_data_dir / '2012-01' / '18' / 'shane' / 'good_2012_01_18_r1002.fits'
+    bad_file = test_data_dir / 'not_from_lick_fits.fits'
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(read_files([good_file, bad_file], executor, chunksize=1))
+
+    assert results[0][0] == good_file
+    assert results[0][1]['instrument'] == Instrument.KAST_RED
+    assert results[0][1]['filename'] == str(good_file)
+    assert results[0][2] is None
+
+    assert results[1][0] == bad_file
+    assert results[1][1] is None
+    assert results[1][2].startswith("ValueError: Unsupported file path:")
@@ -0,0 +1,49 @@
+from datetime import date
+
+import pytest
+
+def test_parse_date_range():
+    from lick_archive.utils.resync_utils import parse_date_range
+
+    assert parse_date_range(None) == (None, None)
+    assert parse_date_range("2019-05-30") == (date(2019,5,30), date(2019,5,30))
+    assert parse_date_range("2019-05-30:2019-06-02") == (date(2019,5,30), date(2019,6,2))
+
+    with pytest.raises(ValueError, match="invalid start date"):
+        parse_date_range("2019-05")
+
+    with pytest.raises(ValueError, match="invalid end date"):
+        parse_date_range("2019-05-30:2019-06")
+
+    with pytest.raises(ValueError, match="invalid start date"):
+        parse_date_range("2019-13-30")
+
+    with pytest.raises(ValueError, match="invalid end date"):
+        parse_date_range("2019-05-30:2019-06-31")
+
+def test_get_dirs_for_daterange(tmp_path):
+    from lick_archive.utils.resync_utils import get_dirs_for_daterange
+
+    # Build a small archive directory tree
+    for day_dir in ["2019-05/30", "2019-05/31", "2019-06/01", "2019-06/02"]:
+        for instr_dir in ["shane", "AO", "nickel"]:
+            (tmp_path / day_dir / instr_dir).mkdir(parents=True)
+    # Entries that don't follow the naming convention should be ignored
+    (tmp_path / "lost+found").mkdir()
+    (tmp_path / "2019-05" / "README").touch()
+    (tmp_path / "2019-06" / "01" / "shane.txt").touch()
+
+    results = sorted(get_dirs_for_daterange("2019-05-31:2019-06-01", ["shane", "AO"], archive_root=tmp_path))
+    assert results == sorted([tmp_path / "2019-05/31/shane", tmp_path / "2019-05/31/AO",
+                              tmp_path / "2019-06/01/shane", tmp_path / "2019-06/01/AO"])
+
+    results = sorted(get_dirs_for_daterange("2019-06-02", ["AO"], archive_root=tmp_path))
+    assert results == [tmp_path / "2019-06/02/AO"]
+
+    # No date range should return everything
+    results = list(get_dirs_for_daterange(None, ["shane"], archive_root=tmp_path))
+    assert len(results) == 4
+
+    # Unsupported instruments are an error
+    with pytest.raises(ValueError, match="not in the list of supported"):
+        list(get_dirs_for_daterange("2019-06-02", ["nickel"], archive_root=tmp_path))
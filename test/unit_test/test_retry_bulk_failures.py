@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from test_utils import make_metadata_row
+
+def test_get_failed_files(tmp_path):
+    from scripts.admin_scripts.retry_bulk_failures import get_failed_files
+
+    failures_file = tmp_path / "ingest_failures.txt"
+    failures_file.write_text("Failed to read /data/2014-05/20/AO/s0002.fits: Unknown FITS file\n"
+                             "Traceback line that is not a failure\n"
+                             "Failed to retry /data/2014-05/20/AO/s0003.fits: Failed to insert\n"
+                             "  Failed to read indented lines are ignored\n"
+                             "Failed to insert batch\n"
+                             "Failed to read /data/2014-05/20/AO/s0004.fits:")
+
+    assert list(get_failed_files(failures_file)) == [Path("/data/2014-05/20/AO/s0002.fits"),
+                                                     Path("/data/2014-05/20/AO/s0003.fits"),
+                                                     Path("/data/2014-05/20/AO/s0004.fits")]
+
+    empty_file = tmp_path / "empty.txt"
+    empty_file.touch()
+    assert list(get_failed_files(empty_file)) == []
+
+def test_retry_one_by_one(tmp_path, sqlite_engine):
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from lick_archive.db.archive_schema import FileMetadata
+    from lick_archive.db.db_utils import insert_batch, file_metadata_to_dict
+    from scripts.admin_scripts.retry_bulk_failures import retry_one_by_one, get_failed_files
+
+    def make_row(filename):
+        return file_metadata_to_dict(make_metadata_row(filename))
+
+    error_file = tmp_path / "ingest_failures.txt"
+    with Session(sqlite_engine) as session:
+        insert_batch(session, [make_row("existing.fits")])
+        session.commit()
+
+        # A bad row that violates a constraint but isn't a duplicate
+        bad_row = make_row("bad.fits")
+        bad_row["telescope"] = None
+        batch = [make_row("new1.fits"), make_row("existing.fits"), bad_row, make_row("new2.fits")]
+        assert retry_one_by_one(error_file, sqlite_engine, session, batch) == 2
+
+        assert sorted(session.scalars(select(FileMetadata.filename)).all()) == ["existing.fits", "new1.fits", "new2.fits"]
+
+    assert list(get_failed_files(error_file)) == [Path("bad.fits")]
@@ -0,0 +1,21 @@
+def test_get_unique_file(tmp_path):
+    from lick_archive.utils.script_utils import get_unique_file
+
+    # The first file should be created without a number
+    unique_file = get_unique_file(tmp_path, "ingest_failures", "txt")
+    assert unique_file == tmp_path / "ingest_failures.txt"
+    assert unique_file.exists()
+
+    # Subsequent files should be numbered
+    assert get_unique_file(tmp_path, "ingest_failures", ".txt") == tmp_path / "ingest_failures.1.txt"
+    assert get_unique_file(tmp_path, "ingest_failures", "txt") == tmp_path / "ingest_failures.2.txt"
+
+    # Numbering should continue after the highest existing file
+    (tmp_path / "ingest_failures.10.txt").touch()
+    (tmp_path / "ingest_failures.other.txt").touch()
+    assert get_unique_file(tmp_path, "ingest_failures", "txt") == tmp_path / "ingest_failures.11.txt"
+
+    # A different prefix or extension shouldn't be affected
+    assert get_unique_file(tmp_path, "resync_failures", "txt") == tmp_path / "resync_failures.txt"
+    assert get_unique_file(tmp_path, "ingest_failures") == tmp_path / "ingest_failures"
+    assert get_unique_file(tmp_path, "ingest_failures") == tmp_path / "ingest_failures.1"
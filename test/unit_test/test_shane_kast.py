@@ -42,7 +42,7 @@ def test_red_headers():
     assert row.instrument == Instrument.KAST_RED
     assert row.filename == str(path)
     assert row.obs_date == datetime(2012, 1, 3, 6, 12, 31, 110000, tzinfo=timezone.utc)
-    assert row.ingest_flags == '00000000000000000000000000000001'
+    assert row.ingest_flags == 0b1
     assert row.exptime == 1.0
     assert row.ra == '01:42:48.5'
     assert row.dec == '29:22:13.0'
@@ -78,7 +78,7 @@ def test_red_headers():
     assert row.dec == 37.27479171753
     assert row.frame_type == FrameType.arc
 
-    assert row.ingest_flags == "00000000000000000000000000000000"
+    assert row.ingest_flags == 0
 
     file = '2019-12_16_shane_r5079-hdu0.txt'
     hdul = get_hdul_from_text([test_data_dir / file])
@@ -92,7 +92,7 @@ def test_red_headers():
     assert row.instrument == Instrument.KAST_RED
 
     assert row.frame_type == FrameType.unknown
-    assert row.ingest_flags == "00000000000000000000001000011001"
+    assert row.ingest_flags == 0b1000011001
     assert row.object is None
     assert row.obs_date == datetime(2019, 12, 16, 12, 0, 0, 0, tzinfo=timezone(offset=timedelta(hours=-8)))
 
@@ -108,7 +108,7 @@ def test_red_headers():
     assert row.instrument == Instrument.KAST_RED
 
     assert row.frame_type == FrameType.bias
-    assert row.ingest_flags == "00000000000000000000000000000000"
+    assert row.ingest_flags == 0
 
     file = '2019-05_02_shane_r650-hdu0.txt'
     hdul = get_hdul_from_text([test_data_dir / file])
@@ -122,7 +122,7 @@ def test_red_headers():
     assert row.instrument == Instrument.KAST_RED
 
     assert row.frame_type == FrameType.science
-    assert row.ingest_flags == "00000000000000000000000000000000"
+    assert row.ingest_flags == 0
 
     file = '2012-01_20_shane_r104-hdu0.txt'
     hdul = get_hdul_from_text([test_data_dir / file])
@@ -136,7 +136,7 @@ def test_red_headers():
     assert row.instrument == Instrument.KAST_RED
 
     assert row.frame_type == FrameType.unknown
-    assert row.ingest_flags == "00000000000000000000000000010001"
+    assert row.ingest_flags == 0b10001
     assert row.object == ""
 
     # Older product, no VERSION but INSTRUME and SPSIDE
@@ -152,7 +152,7 @@ def test_red_headers():
     assert row.instrument == Instrument.KAST_RED
 
     assert row.frame_type == FrameType.arc
-    assert row.ingest_flags == "00000000000000000000000000000001"
+    assert row.ingest_flags == 0b1
     assert row.object == "IR arc R2"
 
     # Older, had "60" as seconds in RA
@@ -169,7 +169,7 @@ def test_red_headers():
         assert row.instrument == Instrument.KAST_RED
 
         assert row.frame_type == FrameType.flat
-        assert row.ingest_flags == "00000000000000000000000000000001"
+        assert row.ingest_flags == 0b1
         assert row.object == "flat"
         assert row.program == 'KAST'
         assert row.ra == "14:11:60.0"
@@ -190,7 +190,7 @@ def test_red_headers():
     assert row.instrument == Instrument.KAST_RED
 
     assert row.frame_type == FrameType.flat
-    assert row.ingest_flags == "00000000000000000000000000000001"
+    assert row.ingest_flags == 0b1
     assert row.object == "Vis2S flat"
     assert row.program == 'KAST'
 
@@ -207,7 +207,7 @@ def test_red_headers():
     assert row.instrument == Instrument.KAST_RED
 
     assert row.frame_type == FrameType.science
-    assert row.ingest_flags == "00000000000000000000001000000001"
+    assert row.ingest_flags == 0b1000000001
     assert row.object == "test"
     assert row.ra == '29829:03:39.4'
     assert row.dec == '+00:00:00.0'
@@ -226,7 +226,7 @@ def test_blue_headers():
     row = reader.read_row(path, hdul)
     assert row.telescope == Telescope.SHANE
     assert row.instrument == Instrument.KAST_BLUE
-    assert row.ingest_flags == '00000000000000000000000000000001'
+    assert row.ingest_flags == 0b1
     assert row.frame_type == FrameType.science
 
     file = '2018-11_16_shane_b1004-hdu0.txt'
@@ -241,7 +241,7 @@ def test_blue_headers():
     assert row.instrument == Instrument.KAST_BLUE
     assert row.frame_type == FrameType.arc
 
-    assert row.ingest_flags == "00000000000000000000000000000000"
+    assert row.ingest_flags == 0
 
     file = '2019-05_04_shane_b2-hdu0.txt'
     hdul = get_hdul_from_text([test_data_dir / file])
@@ -255,7 +255,7 @@ def test_blue_headers():
     assert row.instrument == Instrument.KAST_BLUE
 
     assert row.frame_type == FrameType.unknown
-    assert row.ingest_flags == "00000000000000000000001000011001"
+    assert row.ingest_flags == 0b1000011001
     assert row.object is None
     assert row.obs_date == datetime(2019, 5, 4, 12, 0, 0, 0, tzinfo=timezone(offset=timedelta(hours=-8)))
 
@@ -271,7 +271,7 @@ def test_blue_headers():
     assert row.instrument == Instrument.KAST_BLUE
 
     assert row.frame_type == FrameType.flat
-    assert row.ingest_flags == "00000000000000000000000000000000"
+    assert row.ingest_flags == 0
 
     file = '2012-01_18_shane_b1011-hdu0.txt'
     hdul = get_hdul_from_text([test_data_dir / file])
@@ -285,7 +285,7 @@ def test_blue_headers():
     assert row.instrument == Instrument.KAST_BLUE
 
     assert row.frame_type == FrameType.bias
-    assert row.ingest_flags == "00000000000000000000000000000001"
+    assert row.ingest_flags == 0b1
 
     file = '2006-08_17_shane_b100-hdu0.txt'
     hdul = get_hdul_from_text([test_data_dir / file])
@@ -299,7 +299,7 @@ def test_blue_headers():
     assert row.instrument == Instrument.KAST_BLUE
 
     assert row.frame_type == FrameType.science
-    assert row.ingest_flags == "00000000000000000000000000000001"
+    assert row.ingest_flags == 0b1
     assert row.object == "sn2006eb uv"
 
     # Has invalid \x00 chars in header
@@ -316,6 +316,6 @@ def test_blue_headers():
         assert row.instrument == Instrument.KAST_BLUE
 
         assert row.frame_type == FrameType.dark
-        assert row.ingest_flags == "00000000000000000000010000000001"
+        assert row.ingest_flags == 0b10000000001
         assert row.object == "KAST BLUE -108c dark ARAL s8g1"
         assert row.header.find('\x00') == -1
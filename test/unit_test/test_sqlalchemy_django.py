@@ -20,7 +20,7 @@ from lick_archive.db.pgsphere import SCircle, SPoint
 
 from lick_archive.metadata.shane_ao_sharcs import ShaneAO_ShARCS
 from lick_archive.metadata.metadata_utils import get_hdul_from_text
-from test_utils import MockDatabase
+from test_utils import MockDatabase, basic_django_setup
 
 from lick_archive.apps.query.sqlalchemy_django_utils import SQLAlchemyORMSerializer, SQLAlchemyQuerySet
 
@@ -48,8 +48,8 @@ def test_sqlalchemy_orm_serializer():
     assert result['object'] == 'domeflats'
     # Test Python enum
     assert result['frame_type'] == 'flat'
-    # Test bitstring
-    assert result['ingest_flags'] == '00000000000000000000000000000110'
+    # Test ingest flags integer
+    assert result['ingest_flags'] == 0b110
 
     with pytest.raises(ValueError, match = "Error serializing database results."):
         serializer.to_representation(row)
@@ -77,13 +77,13 @@ def test_queryset_get_orm_attrib():
 def test_queryset_filter():
 
     test_rows = [ FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.arc,     object=None, filename="testfile1.fits",  ingest_flags='00000000000000000000000000000000'),
+                       frame_type=FrameType.arc,     object=None, filename="testfile1.fits",  ingest_flags=0),
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2018, month=12, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="object 1", filename="testfile2.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="object 1", filename="testfile2.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="object 2", filename="testfile3.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="object 2", filename="testfile3.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="object 3", filename="testfile4.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="object 3", filename="testfile4.fits",  ingest_flags=0),                       
                 ]
 
     with MockDatabase(Base, test_rows) as mock_db:
@@ -124,7 +124,7 @@ def test_queryset_filter():
 
         with pytest.raises(APIException, match="Failed building query."):
             # Unsupported op
-            filtered_queryset = queryset.filter(ingest_flags__and="00000000000000000000000000000001")
+            filtered_queryset = queryset.filter(ingest_flags__and=1)
 
         with pytest.raises(APIException, match="Unknown field bad_field."):
             # Unknown field
@@ -133,13 +133,13 @@ def test_queryset_filter():
 def test_queryset_order_by():
 
     test_rows = [ FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.arc,     object="Object C", filename="testfile1.fits",  ingest_flags='00000000000000000000000000000000'),
+                       frame_type=FrameType.arc,     object="Object C", filename="testfile1.fits",  ingest_flags=0),
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2018, month=12, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object D", filename="testfile2.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object D", filename="testfile2.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object B", filename="testfile3.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object B", filename="testfile3.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object A", filename="testfile4.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object A", filename="testfile4.fits",  ingest_flags=0),                       
                 ]
 
     with MockDatabase(Base, test_rows) as mock_db:
@@ -164,13 +164,13 @@ def test_queryset_order_by():
 def test_queryset_values():
 
     test_rows = [ FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.arc,     object="Object C", filename="testfile1.fits",  ingest_flags='00000000000000000000000000000000'),
+                       frame_type=FrameType.arc,     object="Object C", filename="testfile1.fits",  ingest_flags=0),
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2018, month=12, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object D", filename="testfile2.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object D", filename="testfile2.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object B", filename="testfile3.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object B", filename="testfile3.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object A", filename="testfile4.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object A", filename="testfile4.fits",  ingest_flags=0),                       
                 ]
 
     with MockDatabase(Base, test_rows) as mock_db:
@@ -197,13 +197,13 @@ def test_queryset_values():
 
 def test_queryset_slicing():
     test_rows = [ FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.arc,     object="Object C", filename="testfile1.fits",  ingest_flags='00000000000000000000000000000000'),
+                       frame_type=FrameType.arc,     object="Object C", filename="testfile1.fits",  ingest_flags=0),
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2018, month=12, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object D", filename="testfile2.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object D", filename="testfile2.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object B", filename="testfile3.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object B", filename="testfile3.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object A", filename="testfile4.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object A", filename="testfile4.fits",  ingest_flags=0),                       
                 ]
 
     with MockDatabase(Base, test_rows) as mock_db:
@@ -294,13 +294,13 @@ def test_queryset_slicing():
 
 def test_queryset_count():
     test_rows = [ FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.arc,     object="Object C", filename="testfile1.fits",  ingest_flags='00000000000000000000000000000000'),
+                       frame_type=FrameType.arc,     object="Object C", filename="testfile1.fits",  ingest_flags=0),
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2018, month=12, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object D", filename="testfile2.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object D", filename="testfile2.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object B", filename="testfile3.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object B", filename="testfile3.fits",  ingest_flags=0),                       
                   FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2020, month=6, day=1, hour=0, minute=0, second=0),
-                       frame_type=FrameType.science, object="Object A", filename="testfile4.fits",  ingest_flags='00000000000000000000000000000000'),                       
+                       frame_type=FrameType.science, object="Object A", filename="testfile4.fits",  ingest_flags=0),                       
                 ]
 
     with MockDatabase(Base, test_rows) as mock_db:
@@ -314,3 +314,32 @@ def test_queryset_count():
 
         # Test zero count
         assert queryset.filter(frame_type__exact = FrameType.flat).count() == 0
+
+@basic_django_setup
+def test_queryset_count_cache():
+    from django.core.cache import cache
+    from sqlalchemy import delete
+    from lick_archive.db.db_utils import open_db_session
+
+    test_rows = [ FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2019, month=6, day=1, hour=0, minute=0, second=0),
+                       frame_type=FrameType.arc,     object="Object C", filename="testfile1.fits",  ingest_flags=0),
+                  FileMetadata(telescope=Telescope.SHANE, instrument=Instrument.KAST_BLUE, obs_date = datetime(year=2018, month=12, day=1, hour=0, minute=0, second=0),
+                       frame_type=FrameType.science, object="Object D", filename="testfile2.fits",  ingest_flags=0),
+                ]
+
+    cache.clear()
+    with MockDatabase(Base, test_rows) as mock_db:
+        queryset = SQLAlchemyQuerySet(mock_db.engine, FileMetadata, count_cache_timeout=30)
+        assert queryset.count() == 2
+        assert queryset.filter(frame_type__exact = FrameType.science).count() == 1
+
+        with open_db_session(mock_db.engine) as session:
+            session.execute(delete(FileMetadata))
+            session.commit()
+
+        # The cached counts are returned, but a different query or an uncached query goes to the database
+        assert queryset.count() == 2
+        assert queryset.filter(frame_type__exact = FrameType.science).count() == 1
+        assert queryset.filter(frame_type__exact = FrameType.arc).count() == 0
+        assert SQLAlchemyQuerySet(mock_db.engine, FileMetadata).count() == 0
+    cache.clear()
@@ -0,0 +1,139 @@
+import gzip
+import io
+import os
+import tarfile
+
+import pytest
+
+
+def make_test_files(tmp_path):
+    # Files of different sizes, including an empty file, one that fills a tar block exactly,
+    # and one larger than the chunk size used by the tests
+    sizes = {"empty.fits": 0, "small.fits": 100, "block.fits": 512, "large.fits": 10000}
+    files = []
+    for name, size in sizes.items():
+        file = tmp_path / name
+        file.write_bytes(bytes(i % 251 for i in range(size)))
+        files.append(file)
+    return files
+
+@pytest.mark.parametrize("enable_gzip", [False, True])
+def test_tarfile_stream(tmp_path, enable_gzip):
+    from lick_archive.apps.download.tarfile_stream import TarFileStream
+
+    files = make_test_files(tmp_path)
+    arcfiles = [f"data/{file.name}" for file in files]
+    chunk_size = 1024
+    chunks = list(TarFileStream("test.tar.gz", files, arcfiles=arcfiles, enable_gzip=enable_gzip, chunk_size=chunk_size))
+
+    # Every chunk but the last should be at least a full chunk
+    assert all(len(chunk) >= chunk_size for chunk in chunks[:-1])
+    assert len(chunks[-1]) > 0
+
+    data = b''.join(chunks)
+    if enable_gzip:
+        data = gzip.decompress(data)
+
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as tar:
+        assert tar.getnames() == arcfiles
+        for file, arcfile in zip(files, arcfiles):
+            assert tar.extractfile(arcfile).read() == file.read_bytes()
+            member = tar.getmember(arcfile)
+            assert member.uname == file.owner()
+            assert member.gname == file.group()
+            # No pax extended headers are needed for these files
+            assert member.pax_headers == {}
+
+def test_tarfile_stream_arcfiles(tmp_path):
+    from lick_archive.apps.download.tarfile_stream import TarFileStream
+
+    files = make_test_files(tmp_path)
+    with pytest.raises(ValueError, match="must match the length"):
+        TarFileStream("test.tar", files, arcfiles=["one_name.fits"])
+
+    # Without arcfiles, the file paths are used without the leading /
+    data = b''.join(TarFileStream("test.tar", files[1:2]))
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as tar:
+        assert tar.getnames() == [str(files[1].relative_to("/"))]
+
+def test_tarfile_stream_file_infos(tmp_path):
+    from lick_archive.apps.download.tarfile_stream import TarFileStream
+
+    files = make_test_files(tmp_path)[1:4]
+    arcfiles = [file.name for file in files]
+
+    # The first TarInfo matches its file, and is used for its header. The second file's size is
+    # too large and the third's too small (such as a symlink, or a file changed since it was
+    # ingested), so their headers are created from the files instead.
+    file_infos = []
+    for arcfile, file, size in zip(arcfiles, files, [100, 1000, 10]):
+        tar_info = tarfile.TarInfo(arcfile)
+        tar_info.size = size
+        tar_info.mode = 0o444
+        file_infos.append(tar_info)
+
+    with pytest.raises(ValueError, match="must match the length"):
+        TarFileStream("test.tar", files, arcfiles=arcfiles, file_infos=file_infos[0:1])
+
+    data = b''.join(TarFileStream("test.tar", files, arcfiles=arcfiles, file_infos=file_infos))
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as tar:
+        assert tar.getnames() == arcfiles
+        for file, arcfile in zip(files, arcfiles):
+            assert tar.extractfile(arcfile).read() == file.read_bytes()
+        assert tar.getmember(arcfiles[0]).mode == 0o444
+        assert tar.getmember(arcfiles[1]).uname == files[1].owner()
+
+    # A symlink is stored as the file it links to
+    link = tmp_path / "link.fits"
+    link.symlink_to(files[2])
+    link_info = tarfile.TarInfo("link.fits")
+    link_info.size = link.lstat().st_size
+    data = b''.join(TarFileStream("test.tar", [link], arcfiles=["link.fits"], file_infos=[link_info]))
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as tar:
+        assert tar.extractfile("link.fits").read() == files[2].read_bytes()
+
+def test_tarfile_stream_close(tmp_path):
+    from lick_archive.apps.download.tarfile_stream import TarFileStream
+
+    files = make_test_files(tmp_path)
+    stream = TarFileStream("test.tar", files[3:], chunk_size=1024)
+
+    # Stop part way through the file, as when a client disconnects
+    next(stream)
+    fd = stream.current_fd
+    assert fd is not None
+    stream.close()
+    assert stream.current_fd is None
+    with pytest.raises(OSError):
+        os.fstat(fd)
+
+def test_tarfile_stream_size(tmp_path):
+    from lick_archive.apps.download.tarfile_stream import TarFileStream
+
+    files = make_test_files(tmp_path)
+    # A long name that needs an extra pax header, and a TarInfo with a stale size
+    arcfiles = [f"data/{file.name}" for file in files]
+    arcfiles[0] = "data/" + "x" * 200 + ".fits"
+    stale_info = tarfile.TarInfo(arcfiles[2])
+    stale_info.size = 1000
+    file_infos = [None, None, stale_info, None]
+
+    stream = TarFileStream("test.tar", files, arcfiles=arcfiles, file_infos=file_infos)
+    size = stream.tarball_size()
+    data = b''.join(stream)
+    assert size == len(data)
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as tar:
+        assert tar.getnames() == arcfiles
+        assert tar.extractfile(arcfiles[2]).read() == files[2].read_bytes()
+
+    # A file that changes size after the tarball's size was promised fails the stream
+    # rather than sending a corrupt file
+    stream = TarFileStream("test.tar", files, arcfiles=arcfiles, chunk_size=1024)
+    size = stream.tarball_size()
+    files[3].write_bytes(b"changed")
+    with pytest.raises(RuntimeError, match="tar header"):
+        b''.join(stream)
+    assert stream.current_fd is None
+
+    # The size of a gzipped tarball isn't known in advance
+    assert TarFileStream("test.tar.gz", files, enable_gzip=True).tarball_size() is None